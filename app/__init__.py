@@ -4,6 +4,7 @@ from flask_socketio import SocketIO
 from flask_sqlalchemy import SQLAlchemy
 from flask_mail import Mail
 from .config import Config
+from .message_queue import socketio_options
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -16,7 +17,12 @@ def create_app(config_class=Config):
 
     # Initialize Flask extensions
     db.init_app(app)
-    socketio.init_app(app, cors_allowed_origins="*", async_mode="threading")
+    socketio.init_app(
+        app,
+        cors_allowed_origins="*",
+        async_mode=app.config["SOCKETIO_ASYNC_MODE"],
+        **socketio_options(app.config),
+    )
     mail.init_app(app)
 
     with app.app_context():
@@ -34,4 +40,19 @@ def create_app(config_class=Config):
 
         init_socketio(socketio)
 
+        # Background writer for write-behind chat messages
+        from app.services.message_writer import init_message_writer
+
+        init_message_writer(app)
+
+        # Register CLI commands
+        from app.commands import init_commands
+
+        init_commands(app)
+
+        # Count SQL statements per request
+        from app.query_counter import init_query_counter
+
+        init_query_counter(app)
+
     return app
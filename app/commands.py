@@ -0,0 +1,99 @@
+import click
+
+from app import db
+
+
+def init_commands(app):
+    @app.cli.group()
+    def timeline():
+        """Friends timeline maintenance"""
+
+    @timeline.command("backfill")
+    def backfill_timeline_command():
+        """Rebuild every friends timeline from the existing friendships"""
+        from app.services.timeline import rebuild_timelines
+
+        count = rebuild_timelines()
+        db.session.commit()
+        click.echo(f"Timelines rebuilt with {count} entries.")
+
+    @app.cli.group()
+    def counters():
+        """Denormalized counter maintenance"""
+
+    @counters.command("reconcile")
+    def reconcile_counters_command():
+        """Repair like, comment and share counters that drifted from the source rows"""
+        from app.services.counters import reconcile_counters
+
+        repaired = reconcile_counters()
+        db.session.commit()
+
+        for name, count in repaired.items():
+            click.echo(f"{name}: {count} rows repaired.")
+
+    @app.cli.group()
+    def conversations():
+        """Message inbox maintenance"""
+
+    @conversations.command("rebuild")
+    def rebuild_conversations_command():
+        """Rebuild every conversation from the existing messages"""
+        from app.services.conversations import rebuild_conversations
+
+        count = rebuild_conversations()
+        db.session.commit()
+        click.echo(f"{count} conversations rebuilt.")
+
+    @app.cli.group()
+    def hashtags():
+        """Hashtag index maintenance"""
+
+    @hashtags.command("reindex")
+    def reindex_hashtags_command():
+        """Rebuild the post hashtag index from post content"""
+        from app.services.hashtags import reindex_hashtags
+
+        count = reindex_hashtags()
+        db.session.commit()
+        click.echo(f"Hashtag index rebuilt with {count} links.")
+
+    @hashtags.command("prune-counts")
+    def prune_hashtag_counts_command():
+        """Delete trending counters older than the longest trending window"""
+        from app.services.trending import prune_hashtag_counts
+
+        count = prune_hashtag_counts()
+        db.session.commit()
+        click.echo(f"{count} expired hashtag counters deleted.")
+
+    @app.cli.group()
+    def suggestions():
+        """People you may know"""
+
+    @suggestions.command("rebuild")
+    def rebuild_suggestions_command():
+        """Recompute every user's suggestions from the friendship graph, run periodically"""
+        from app.services.suggestions import rebuild_suggestions
+
+        count = rebuild_suggestions()
+        db.session.commit()
+        click.echo(f"{count} suggestions computed.")
+
+    @app.cli.group("socketio")
+    def socketio_group():
+        """Socket.IO message queue"""
+
+    @socketio_group.command("broker")
+    def socketio_broker_command():
+        """Run the local:// message queue broker for multi-process development"""
+        from app.message_queue import run_broker
+
+        url = app.config["SOCKETIO_MESSAGE_QUEUE"] or "local://localhost:6380"
+        if not url.startswith("local://"):
+            raise click.UsageError(f"{url} is not a local:// message queue")
+
+        click.echo(f"Socket.IO broker listening on {url}")
+        run_broker(url, app.config["SECRET_KEY"].encode())
+
+    return app
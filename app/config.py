@@ -14,6 +14,41 @@ class Config:
     UPLOAD_PATH = "image_uploads"
     UPLOAD_AVATAR_PATH = "static/avatars"
     MAX_CONTENT_LENGTH = 1024 * 1024  # 1 MB
+    FEED_PAGE_SIZE = int(os.getenv("FEED_PAGE_SIZE", 20))
+    MESSAGE_PAGE_SIZE = int(os.getenv("MESSAGE_PAGE_SIZE", 20))
+    COMMENT_PAGE_SIZE = int(os.getenv("COMMENT_PAGE_SIZE", 3))
+    FRIEND_REQUEST_PAGE_SIZE = int(os.getenv("FRIEND_REQUEST_PAGE_SIZE", 20))
+    DIRECTORY_PAGE_SIZE = int(os.getenv("DIRECTORY_PAGE_SIZE", 20))
+    AUTOCOMPLETE_LIMIT = int(os.getenv("AUTOCOMPLETE_LIMIT", 8))
+    # Posts copied into each timeline when two users become friends
+    TIMELINE_BACKFILL_LIMIT = int(os.getenv("TIMELINE_BACKFILL_LIMIT", 50))
+    # Trending hashtags are counted in buckets of this many minutes
+    TRENDING_BUCKET_MINUTES = int(os.getenv("TRENDING_BUCKET_MINUTES", 10))
+    TRENDING_CACHE_TTL = int(os.getenv("TRENDING_CACHE_TTL", 60))  # seconds
+    # Friendship pairs cached per process for the chat friend check
+    FRIENDSHIP_CACHE_SIZE = int(os.getenv("FRIENDSHIP_CACHE_SIZE", 10000))
+    FRIENDSHIP_CACHE_TTL = int(os.getenv("FRIENDSHIP_CACHE_TTL", 60))  # seconds
+    # People you may know: candidates kept per user, and how much one mutual
+    # friend weighs against one shared class or interest
+    SUGGESTIONS_PER_USER = int(os.getenv("SUGGESTIONS_PER_USER", 20))
+    SUGGESTION_MUTUAL_WEIGHT = int(os.getenv("SUGGESTION_MUTUAL_WEIGHT", 3))
+    # threading, eventlet or gevent, must match the gunicorn worker class
+    SOCKETIO_ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "threading")
+    # Socket.IO message queue shared by every worker, e.g. redis://localhost:6379/0,
+    # or local://localhost:6380 with "flask socketio broker" for development.
+    # Unset keeps emits inside a single process
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE")
+    SOCKETIO_CHANNEL = os.getenv("SOCKETIO_CHANNEL", "network50")
+    # Write-behind chat: a message is broadcast as soon as it arrives and a
+    # background writer inserts the queue in batches every
+    # MESSAGE_FLUSH_INTERVAL_MS. Queued messages are lost if the process dies
+    # before the next flush, a clean shutdown writes them. Off commits every
+    # message before broadcasting it
+    MESSAGE_WRITE_BEHIND = os.getenv("MESSAGE_WRITE_BEHIND", "false").lower() == "true"
+    MESSAGE_FLUSH_INTERVAL_MS = int(os.getenv("MESSAGE_FLUSH_INTERVAL_MS", 5))
+    MESSAGE_FLUSH_BATCH_SIZE = int(os.getenv("MESSAGE_FLUSH_BATCH_SIZE", 500))
+    # Maximum SQL statements per request, None disables the check
+    QUERY_BUDGET = None
 
 
 class DevelopmentConfig(Config):
@@ -22,6 +57,7 @@ class DevelopmentConfig(Config):
 
 class TestingConfig(Config):
     TESTING = True
+    QUERY_BUDGET = 20
 
 
 class ProductionConfig(Config):
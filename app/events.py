@@ -1,46 +1,80 @@
 # app/events.py
-from flask import request, session, url_for
-from flask_socketio import emit
+from datetime import datetime
+
+from flask import current_app, session, url_for
+from flask_socketio import emit, join_room
+from sqlalchemy.exc import IntegrityError
 
 from app.helpers import format_time_ago
 from app.models import db, Message, User
-
-# Remove the socketio initialization from here
-connected_users = {}
+from app.services.conversations import record_message
+from app.services.counters import increment_counter
+from app.services.friendships import are_friends
+from app.services.message_writer import enqueue_message, get_stored_message_id, new_client_id
+from app.services.realtime import emit_to_user, emit_to_users, user_room
 
 def init_socketio(socketio):
+    # Emits target the user's room instead of a sid, rooms are shared
+    # between workers through the message queue
+    # Every tab and device of a user joins the same room, nothing is tracked per
+    # sid so there is no cleanup on disconnect
     @socketio.on("connect")
     def handle_connect():
-        user_id = session["user_id"]
-        if user_id:
-            connected_users[user_id] = request.sid
+        user_id = session.get("user_id")
+        if not user_id:
+            return False
 
-    @socketio.on("disconnect")
-    def handle_disconnect():
-        user_id = session["user_id"]
-        if user_id in connected_users:
-            del connected_users[user_id]
+        join_room(user_room(user_id))
 
     @socketio.on("send_message")
     def handle_send_message_event(data):
         username = data["username"]
         content = data["message"]
         is_first_message = data["firstMessage"]
+        # Generated by the sending tab, echoed back so it can match the broadcast
+        client_id = str(data.get("clientId") or "")[:36] or new_client_id()
 
         # Get the current user and the recipient
         current_user = db.get_or_404(User, session["user_id"])
         target_user = User.query.filter_by(username=username).first()
 
-        if target_user and target_user.id in [friend.id for friend in current_user.friends]:
-            # Create and save the new message
-            message = Message(
-                content=content, 
-                recipient_id=target_user.id, 
-                sender_id=current_user.id
-            )
+        if target_user and are_friends(current_user.id, target_user.id):
+            if current_app.config["MESSAGE_WRITE_BEHIND"]:
+                # A resend of a stored or still queued message is only acknowledged
+                stored_id = get_stored_message_id(current_user.id, client_id)
+                if stored_id or not enqueue_message(
+                    current_user.id, target_user.id, content, client_id
+                ):
+                    return {"client_id": client_id, "id": stored_id}
+
+                # Broadcast now, the background writer stores it within a few ms
+                message_id = None
+                created_at = datetime.utcnow().replace(microsecond=0)
+            else:
+                # Create and save the new message
+                message = Message(
+                    content=content,
+                    recipient_id=target_user.id,
+                    sender_id=current_user.id,
+                    client_id=client_id,
+                )
 
-            db.session.add(message)
-            db.session.commit()
+                try:
+                    db.session.add(message)
+                    db.session.flush()
+                    record_message(message)
+                    increment_counter(User.unread_messages, target_user.id)
+                    db.session.commit()
+                except IntegrityError:
+                    # Resent with the same clientId, it was stored the first time
+                    db.session.rollback()
+                    stored_id = get_stored_message_id(current_user.id, client_id)
+                    if stored_id is None:
+                        raise
+                    return {"client_id": client_id, "id": stored_id}
+
+                message_id = message.id
+                created_at = message.created_at
 
             if is_first_message:
                 emit(
@@ -52,28 +86,28 @@ def init_socketio(socketio):
                 )
 
             message_data = {
-                "content": message.content,
+                "id": message_id,
+                "client_id": client_id,
+                "content": content,
                 "sender": {
                     "id": current_user.id,
+                    "username": current_user.username,
                     "image": current_user.image,
                     "name": current_user.name,
                     "surname": current_user.surname,
                 },
                 "sender_id": current_user.id,
                 "recipient_id": target_user.id,
-                "created_at_iso": message.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                "created_at": format_time_ago(message.created_at),
+                "created_at_iso": created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "created_at": format_time_ago(created_at),
             }
 
-            sender_sid = connected_users.get(current_user.id)
-            recipient_sid = connected_users.get(target_user.id)
-
-            if sender_sid:
-                socketio.emit("receive_message", message_data, to=sender_sid)
+            # Both participants' tabs in one emit
+            emit_to_users([current_user.id, target_user.id], "receive_message", message_data)
+            emit_to_user(target_user.id, "new_unread_message", {"new_message": True})
 
-            if recipient_sid:
-                socketio.emit("receive_message", message_data, to=recipient_sid)
-                socketio.emit("new_unread_message", {"new_message": True}, to=recipient_sid)
+            # Acknowledgement for the sender's emit callback
+            return {"client_id": client_id, "id": message_id}
 
         else:
             emit("message_error", {"error": "Friend not found"})
@@ -5,7 +5,8 @@ import re
 from flask import current_app, flash, redirect, render_template, session, url_for
 from werkzeug.utils import secure_filename
 from datetime import datetime, timedelta
-from functools import wraps
+from functools import lru_cache, wraps
+from markupsafe import Markup, escape
 
 
 def not_found():
@@ -62,10 +63,6 @@ def logout_required(func):
 #     mail.send(msg)
 
 
-def array_to_str(array):
-    return ",".join(array)
-
-
 def validate_image(stream):
     header = stream.read(512)
     stream.seek(0)
@@ -196,63 +193,87 @@ def create_notification_link(notification):
             return "#"
 
 
-# Generated by Claude AI
-def process_hashtags(text):
-    """
-    Process text to convert hashtags into clickable links.
-    Hashtags must:
-    - Start with #
-    - Contain only letters and numbers
-    - Not contain spaces or special characters
+# Hashtags are # followed by letters/numbers only, at most 100 of them to fit
+# Hashtag.name, a longer run is not a hashtag at all rather than a cut one
+HASHTAG_PATTERN = re.compile(r"#([a-zA-Z0-9]{1,100})(?![a-zA-Z0-9])")
 
-    Example:
-    Input: "Hello #World this is a #greatpost!"
-    Output: 'Hello <a href="/hashtag/world">#{world}</a> this is a #<a href="/hashtag/greatpost">#{greatpost}</a>!'
+# URLs start with http://, https://, or www.
+URL_PATTERN = re.compile(r"(https?://[^\s]+)|(www\.[^\s]+)")
+
+
+# URLs, hashtags and HTML special characters in a single pass. A URL is
+# matched first so a '#' inside it stays part of the link. The lookahead lets
+# the scan skip to characters that can start a token
+TEXT_TOKEN_PATTERN = re.compile(
+    "(?=[hw#&<>\"'])"
+    f"(?:(?P<url>{URL_PATTERN.pattern})|(?P<hashtag>{HASHTAG_PATTERN.pattern})|[&<>\"'])"
+)
+
+
+def extract_hashtags(text):
+    """
+    Return the unique lowercase hashtags of a text, from the same scan as
+    process_text so every indexed tag is a rendered one and the other way round
     """
-    # Pattern matches # followed by letters/numbers only
-    pattern = r"#([a-zA-Z0-9]+)"
+    return {
+        match.group("hashtag")[1:].lower()
+        for match in TEXT_TOKEN_PATTERN.finditer(text)
+        if match.group("hashtag")
+    }
+
+
+# Same entities as markupsafe.escape
+HTML_ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&#34;", "'": "&#39;"}
 
-    def replace_tag(match):
-        tag = match.group(1)  # Get the tag without the #
-        # Convert to lowercase for case-insensitive handling
-        tag_lower = tag.lower()
-        return f'<a href="/tags/{tag_lower}">#{tag}</a>'
+# Distinct post texts whose HTML is kept per process
+PROCESSED_TEXT_CACHE_SIZE = 4096
 
-    # Replace all hashtags with their link versions
-    processed_text = re.sub(pattern, replace_tag, text)
 
-    return processed_text
+def render_token(match):
+    url = match.group("url")
+    if url:
+        url = escape(url)
+        # Add https:// to www. urls
+        href = "https://" + url if url.startswith("www.") else url
+        return f'<a href="{href}" target="_blank">{url}</a>'
 
+    tag = match.group("hashtag")
+    if tag:
+        # Letters and numbers only, nothing to escape
+        return f'<a href="/tags/{tag[1:].lower()}">{tag}</a>'
 
-# Also generated by Claude AI
-def process_urls(text):
+    return HTML_ESCAPES[match.group()]
+
+
+@lru_cache(maxsize=PROCESSED_TEXT_CACHE_SIZE)
+def process_text(text):
     """
-    Process text to convert URLs into clickable links.
-    Matches URLs starting with http://, https://, or www.
+    HTML of a post text, URLs and hashtags become links and the rest is
+    escaped. Posts are rendered far more often than written, so the result
+    is memoized by text.
+
+    Example:
+    Input: "Hello #World see www.x.com/#a"
+    Output: 'Hello <a href="/tags/world">#World</a> see <a href="https://www.x.com/#a" target="_blank">www.x.com/#a</a>'
     """
-    # Pattern for URLs - matches http://, https://, or www.
-    url_pattern = r"(https?://[^\s]+)|(www\.[^\s]+)"
+    return Markup(TEXT_TOKEN_PATTERN.sub(render_token, text))
 
-    def replace_url(match):
-        url = match.group(0)
-        # Add https:// to www. urls if needed
-        if url.startswith("www."):
-            full_url = "https://" + url
-        else:
-            full_url = url
-        return f'<a href="{full_url}" target="_blank">{url}</a>'
 
-    # Replace URLs with clickable links
-    processed_text = re.sub(url_pattern, replace_url, text)
+def encode_cursor(created_at: datetime, id):
+    """Encode a (created_at, id) pair into an opaque keyset pagination cursor"""
+    return f"{created_at.isoformat()}_{id}"
 
-    return processed_text
 
+def decode_cursor(cursor):
+    """
+    Decode a cursor created by encode_cursor.
+    Returns (created_at, id) or None if the cursor is missing or malformed.
+    """
+    if not cursor:
+        return None
 
-# Combined processor for both URLs and hashtags
-def process_text(text):
-    """Process text for both URLs and hashtags"""
-    # First process URLs
-    text = process_urls(text)
-    # Then process hashtags
-    text = process_hashtags(text)
-    return text
+    try:
+        created_at, id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(created_at), int(id)
+    except ValueError:
+        return None
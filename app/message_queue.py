@@ -0,0 +1,129 @@
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from urllib.parse import urlparse
+
+import socketio
+
+
+def parse_local_url(url):
+    """local://host:port -> (host, port)"""
+    parsed = urlparse(url)
+    return parsed.hostname or "localhost", parsed.port or 6380
+
+
+class LocalQueueManager(socketio.PubSubManager):
+    """
+    Client manager sharing emits between processes through run_broker, for
+    development and tests when no Redis server is available. Production should
+    use a redis:// queue.
+    """
+
+    name = "local"
+
+    def __init__(self, url, authkey, channel="socketio", write_only=False, logger=None):
+        self.address = parse_local_url(url)
+        self.authkey = authkey
+        self.publisher = None
+        self.publisher_lock = threading.Lock()
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+
+    def _connect(self, role):
+        connection = Client(self.address, authkey=self.authkey)
+        connection.send(role)
+        return connection
+
+    def _publish(self, data):
+        message = {"channel": self.channel, "data": data}
+
+        with self.publisher_lock:
+            # A connection broken by a broker restart is replaced once
+            for retry in (True, False):
+                try:
+                    if self.publisher is None:
+                        self.publisher = self._connect("publish")
+                    self.publisher.send(message)
+                    return
+                except (OSError, EOFError):
+                    self._close_publisher()
+                    if not retry:
+                        raise
+
+    def _close_publisher(self):
+        if self.publisher is not None:
+            try:
+                self.publisher.close()
+            except OSError:
+                pass
+        self.publisher = None
+
+    def _listen(self):
+        retry_sleep = 1
+
+        while True:
+            try:
+                subscriber = self._connect("subscribe")
+                retry_sleep = 1
+
+                while True:
+                    message = subscriber.recv()
+                    if message["channel"] == self.channel:
+                        yield message["data"]
+            except (OSError, EOFError):
+                self._get_logger().error(
+                    f"Cannot receive from the local queue... retrying in {retry_sleep} secs"
+                )
+                time.sleep(retry_sleep)
+                retry_sleep = min(retry_sleep * 2, 60)
+
+
+def run_broker(url, authkey, ready=None):
+    """Forward every published message to every subscriber, runs forever"""
+    subscribers = []
+    subscribers_lock = threading.Lock()
+
+    def forward(connection):
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                return
+
+            with subscribers_lock:
+                for subscriber in list(subscribers):
+                    try:
+                        subscriber.send(message)
+                    except OSError:
+                        subscribers.remove(subscriber)
+
+    with Listener(parse_local_url(url), authkey=authkey) as listener:
+        if ready is not None:
+            ready.set()
+
+        while True:
+            connection = listener.accept()
+
+            if connection.recv() == "subscribe":
+                with subscribers_lock:
+                    subscribers.append(connection)
+            else:
+                threading.Thread(target=forward, args=(connection,), daemon=True).start()
+
+
+def socketio_options(config):
+    """
+    Keyword arguments for socketio.init_app selecting the message queue.
+    Without SOCKETIO_MESSAGE_QUEUE emits stay inside the process.
+    """
+    url = config["SOCKETIO_MESSAGE_QUEUE"]
+    channel = config["SOCKETIO_CHANNEL"]
+
+    if not url:
+        return {}
+
+    if url.startswith("local://"):
+        authkey = config["SECRET_KEY"].encode()
+        return {"client_manager": LocalQueueManager(url, authkey, channel=channel)}
+
+    # redis://, kafka://, amqp:// and the other backends Flask-SocketIO supports
+    return {"message_queue": url, "channel": channel}
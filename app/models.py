@@ -14,36 +14,12 @@ from sqlalchemy import (
     String,
     Table,
     Text,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
 
-# Association table for friends
-friends_table = Table(
-    "friends",
-    db.Model.metadata,
-    Column("user_id", Integer, ForeignKey("user.id")),
-    Column("friend_id", Integer, ForeignKey("user.id")),
-)
-
-# Association table for pending friend requests
-pending_requests_table = Table(
-    "pending_requests",
-    db.Model.metadata,
-    Column("user_id", Integer, ForeignKey("user.id")),
-    Column("pending_id", Integer, ForeignKey("user.id")),
-)
-
-# Association table for received friend requests
-received_requests_table = Table(
-    "received_requests",
-    db.Model.metadata,
-    Column("user_id", Integer, ForeignKey("user.id")),
-    Column("request_id", Integer, ForeignKey("user.id")),
-)
-
-
 # User model
 class User(db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -57,37 +33,15 @@ class User(db.Model):
     location: Mapped[str] = mapped_column(String(150), nullable=True)
     about: Mapped[str] = mapped_column(Text, nullable=True)
     working_on: Mapped[str] = mapped_column(String(200), nullable=True)
-    interests: Mapped[str] = mapped_column(Text, nullable=True)
-    classes: Mapped[str] = mapped_column(Text, nullable=True)
-    links: Mapped[str] = mapped_column(Text, nullable=True)
     is_completed: Mapped[bool] = mapped_column(Boolean, default=False)
     is_public: Mapped[bool] = mapped_column(Boolean, default=True)
 
-    # Many-to-Many relationship for friends
-    friends: Mapped[List["User"]] = relationship(
-        "User",
-        secondary=friends_table,
-        primaryjoin=id == friends_table.c.user_id,
-        secondaryjoin=id == friends_table.c.friend_id,
-        backref="friends_with",
+    # Denormalized unread counters for the navbar, updated with SQL increments
+    unread_messages: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0"
     )
-
-    # Many-to-Many relationship for pending friend requests
-    pending_requests: Mapped[List["User"]] = relationship(
-        "User",
-        secondary=pending_requests_table,
-        primaryjoin=id == pending_requests_table.c.user_id,
-        secondaryjoin=id == pending_requests_table.c.pending_id,
-        backref="pending_from",
-    )
-
-    # Many-to-Many relationship for received friend requests
-    received_requests: Mapped[List["User"]] = relationship(
-        "User",
-        secondary=received_requests_table,
-        primaryjoin=id == received_requests_table.c.user_id,
-        secondaryjoin=id == received_requests_table.c.request_id,
-        backref="received_from",
+    unread_notifications: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0"
     )
 
     posts: Mapped[List["Post"]] = relationship(
@@ -98,10 +52,73 @@ class User(db.Model):
         back_populates="user", cascade="all, delete"
     )
 
+    # Profile lists, written by app/services/profiles.py
+    interests: Mapped[List["UserInterest"]] = relationship(
+        cascade="all, delete-orphan", order_by="UserInterest.name"
+    )
+    classes: Mapped[List["UserClass"]] = relationship(
+        cascade="all, delete-orphan", order_by="UserClass.name"
+    )
+    links: Mapped[List["UserLink"]] = relationship(
+        cascade="all, delete-orphan", order_by="UserLink.id"
+    )
+
     def __repr__(self) -> str:
         return super().__repr__()
 
 
+# Interest of a user, (name, user_id) lists everyone interested in something
+class UserInterest(db.Model):
+    __tablename__ = "user_interest"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+
+    __table_args__ = (db.Index("ix_user_interest_name_user", "name", "user_id"),)
+
+    def __repr__(self) -> str:
+        return f"<UserInterest {self.name} of User {self.user_id}>"
+
+
+# Class taken by a user, (name, user_id) lists the members of a class
+class UserClass(db.Model):
+    __tablename__ = "user_class"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+
+    __table_args__ = (db.Index("ix_user_class_name_user", "name", "user_id"),)
+
+    def __repr__(self) -> str:
+        return f"<UserClass {self.name} of User {self.user_id}>"
+
+
+# Social link on a profile, in the order the user entered them
+class UserLink(db.Model):
+    __tablename__ = "user_link"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("user.id", ondelete="CASCADE"), nullable=False
+    )
+    url: Mapped[str] = mapped_column(String(300), nullable=False)
+
+    __table_args__ = (db.Index("ix_user_link_user", "user_id"),)
+
+    def __repr__(self) -> str:
+        return f"<UserLink {self.url} of User {self.user_id}>"
+
+
+# Case-insensitive prefix search of the directory, see app/services/directory.py
+db.Index("ix_user_username_lower", func.lower(User.username))
+db.Index("ix_user_name_lower", func.lower(User.name))
+db.Index("ix_user_surname_lower", func.lower(User.surname))
+
+
 # Post model
 class Post(db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -112,6 +129,12 @@ class Post(db.Model):
     content: Mapped[str] = mapped_column(Text, nullable=False)
     shares: Mapped[int] = mapped_column(Integer, default=0)
 
+    # Denormalized counters, updated with SQL increments by the routes
+    like_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    comment_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0"
+    )
+
     # Likes
     likes: Mapped[List["Like"]] = relationship(
         primaryjoin="and_(Like.post_id == Post.id, Like.post_id.isnot(None))",
@@ -132,12 +155,12 @@ class Post(db.Model):
     user: Mapped["User"] = relationship("User", back_populates="posts")
     original_post: Mapped["Post"] = relationship("Post", remote_side=[id])
 
+    # Backs the keyset paginated feed, newest first
+    __table_args__ = (db.Index("ix_post_created_at_id", "created_at", "id"),)
+
     def __repr__(self) -> str:
         return f"<Post {self.id} by User {self.user_id}>"
 
-    def is_liked_by_user(self, user_id):
-        return any(like.user_id == user_id for like in self.likes)
-
 
 # Comment model
 class Comment(db.Model):
@@ -148,6 +171,12 @@ class Comment(db.Model):
     content: Mapped[str] = mapped_column(Text, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
 
+    # Denormalized counter, updated with SQL increments by the routes
+    like_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    # Previews and "load more" walk the comments of a post in (created_at, id) order
+    __table_args__ = (db.Index("ix_comment_post_created_at", "post_id", "created_at"),)
+
     post: Mapped["Post"] = relationship(back_populates="comments")
     user: Mapped["User"] = relationship()
 
@@ -160,8 +189,125 @@ class Comment(db.Model):
     def __repr__(self) -> str:
         return f"<Comment {self.id} on Post {self.post_id}>"
 
-    def is_liked_by_user(self, user_id):
-        return any(like.user_id == user_id for like in self.likes)
+
+# Hashtag model
+class Hashtag(db.Model):
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<Hashtag #{self.name}>"
+
+
+# Association table for post hashtags, created_at is copied from the post
+# so a tag page is a single range scan on (hashtag_id, created_at, post_id)
+post_hashtag_table = Table(
+    "post_hashtag",
+    db.Model.metadata,
+    Column(
+        "hashtag_id", Integer, ForeignKey("hashtag.id"), primary_key=True
+    ),
+    Column(
+        "post_id",
+        Integer,
+        ForeignKey("post.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column("created_at", DateTime, nullable=False),
+    db.Index("ix_post_hashtag_tag_created_at_post", "hashtag_id", "created_at", "post_id"),
+    db.Index("ix_post_hashtag_post", "post_id"),
+)
+
+
+# Hashtag uses per time bucket, summed over a window for trending tags
+class HashtagCount(db.Model):
+    __tablename__ = "hashtag_count"
+
+    hashtag_id: Mapped[int] = mapped_column(ForeignKey("hashtag.id"), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    __table_args__ = (db.Index("ix_hashtag_count_bucket", "bucket_start", "hashtag_id"),)
+
+    def __repr__(self) -> str:
+        return f"<HashtagCount {self.hashtag_id} at {self.bucket_start}: {self.count}>"
+
+
+# Friends timeline, filled on write with one row per friend for every new post
+class TimelineEntry(db.Model):
+    __tablename__ = "timeline"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("user.id"), primary_key=True)
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("post.id", ondelete="CASCADE"), primary_key=True
+    )
+    author_id: Mapped[int] = mapped_column(ForeignKey("user.id"), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    # Reading a timeline page is a single range scan on this index
+    __table_args__ = (
+        db.Index("ix_timeline_user_created_at_post", "user_id", "created_at", "post_id"),
+        db.Index("ix_timeline_user_author", "user_id", "author_id"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<TimelineEntry Post {self.post_id} for User {self.user_id}>"
+
+
+# Friendship Enum
+class FriendshipStatusEnum(enum.Enum):
+    PENDING = "pending"
+    ACCEPTED = "accepted"
+
+
+# Friendship model, one row per pair of users whatever the direction
+class Friendship(db.Model):
+    # user_a_id < user_b_id, see friendship_key
+    user_a_id: Mapped[int] = mapped_column(ForeignKey("user.id"), primary_key=True)
+    user_b_id: Mapped[int] = mapped_column(ForeignKey("user.id"), primary_key=True)
+    status: Mapped[FriendshipStatusEnum] = mapped_column(
+        Enum(FriendshipStatusEnum, values_callable=lambda obj: [e.value for e in obj]),
+        nullable=False,
+    )
+    # Sender of the request, the other user is the one who can accept it
+    requested_by_id: Mapped[int] = mapped_column(ForeignKey("user.id"), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=func.now(), server_default=func.now()
+    )
+
+    # Friends and requests of a user on either side of the pair, by request time
+    __table_args__ = (
+        db.Index("ix_friendship_user_a_status", "user_a_id", "status", "created_at"),
+        db.Index("ix_friendship_user_b_status", "user_b_id", "status", "created_at"),
+    )
+
+    def other_user_id(self, user_id):
+        return self.user_b_id if self.user_a_id == user_id else self.user_a_id
+
+    def __repr__(self) -> str:
+        return f"<Friendship {self.user_a_id} {self.status.value} {self.user_b_id}>"
+
+
+# People you may know, precomputed top candidates per user
+class FriendSuggestion(db.Model):
+    __tablename__ = "friend_suggestion"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("user.id"), primary_key=True)
+    candidate_id: Mapped[int] = mapped_column(ForeignKey("user.id"), primary_key=True)
+    mutual_friends: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Classes and interests both users listed
+    shared_tags: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    score: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    # Serving the suggestions of a user is a single range scan
+    __table_args__ = (
+        db.Index("ix_friend_suggestion_user_score", "user_id", "score"),
+    )
+
+    candidate: Mapped["User"] = relationship(foreign_keys=[candidate_id])
+
+    def __repr__(self) -> str:
+        return f"<FriendSuggestion {self.candidate_id} for User {self.user_id}>"
 
 
 # Like model
@@ -179,6 +325,9 @@ class Like(db.Model):
             "(post_id IS NOT NULL AND comment_id IS NULL) OR (post_id IS NULL AND comment_id IS NOT NULL)",
             name="like_on_one_type",
         ),
+        # Back the like toggles and the per-page "liked by me" lookup
+        db.Index("ix_like_user_post", "user_id", "post_id"),
+        db.Index("ix_like_user_comment", "user_id", "comment_id"),
     )
 
     # Relationship to post and comment
@@ -201,6 +350,29 @@ class Message(db.Model):
     content: Mapped[str] = mapped_column(Text, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
     is_read: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Id generated by the sending tab, lets a queued message be written only once
+    client_id: Mapped[str] = mapped_column(String(36), nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint("sender_id", "client_id", name="uq_message_sender_client"),
+        # Both directions of a conversation, newest first
+        db.Index(
+            "ix_message_sender_recipient_created_at",
+            "sender_id",
+            "recipient_id",
+            "created_at",
+        ),
+        # Received side of the latest conversations list
+        db.Index("ix_message_recipient_created_at", "recipient_id", "created_at"),
+        # Unread messages only, they are a small fraction of the table
+        db.Index(
+            "ix_message_unread",
+            "recipient_id",
+            "sender_id",
+            sqlite_where=text("is_read = 0"),
+            postgresql_where=text("is_read = false"),
+        ),
+    )
 
     sender: Mapped["User"] = relationship(
         foreign_keys=[sender_id], backref="sent_messages"
@@ -213,6 +385,56 @@ class Message(db.Model):
         return f"<Message {self.id} from {self.sender_id} to {self.recipient_id}>"
 
 
+# One row per pair of users who exchanged messages, user1_id is always the smaller id
+class Conversation(db.Model):
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user1_id: Mapped[int] = mapped_column(ForeignKey("user.id"), nullable=False)
+    user2_id: Mapped[int] = mapped_column(ForeignKey("user.id"), nullable=False)
+    last_message_id: Mapped[int] = mapped_column(ForeignKey("message.id"), nullable=True)
+    last_activity_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    # Unread messages of each participant in this conversation
+    user1_unread: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    user2_unread: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+
+    # Read receipts, the last message of the conversation each participant has seen
+    user1_last_read_message_id: Mapped[int] = mapped_column(
+        ForeignKey("message.id"), nullable=True
+    )
+    user2_last_read_message_id: Mapped[int] = mapped_column(
+        ForeignKey("message.id"), nullable=True
+    )
+
+    __table_args__ = (
+        db.UniqueConstraint("user1_id", "user2_id", name="uq_conversation_users"),
+        # Inbox of a user, newest activity first
+        db.Index("ix_conversation_user1_activity", "user1_id", "last_activity_at"),
+        db.Index("ix_conversation_user2_activity", "user2_id", "last_activity_at"),
+    )
+
+    user1: Mapped["User"] = relationship(foreign_keys=[user1_id])
+    user2: Mapped["User"] = relationship(foreign_keys=[user2_id])
+    last_message: Mapped["Message"] = relationship(foreign_keys=[last_message_id])
+
+    def other_user(self, user_id):
+        return self.user2 if self.user1_id == user_id else self.user1
+
+    def unread_for(self, user_id):
+        return self.user1_unread if self.user1_id == user_id else self.user2_unread
+
+    def last_read_for(self, user_id):
+        if self.user1_id == user_id:
+            return self.user1_last_read_message_id
+        return self.user2_last_read_message_id
+
+    def __repr__(self):
+        return f"<Conversation {self.id} between {self.user1_id} and {self.user2_id}>"
+
+
 # Notification Enum
 class NotificationEnum(enum.Enum):
     FRIEND_REQUEST = "friend_request"
@@ -240,6 +462,18 @@ class Notification(db.Model):
     is_read: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
 
+    __table_args__ = (
+        # Unread dropdown and lists, newest first
+        db.Index(
+            "ix_notification_recipient_read_created_at",
+            "recipient_id",
+            "is_read",
+            "created_at",
+        ),
+        # Notifications page, read and unread together
+        db.Index("ix_notification_recipient_created_at", "recipient_id", "created_at"),
+    )
+
     # Relationships
     recipient: Mapped["User"] = relationship(
         foreign_keys=[recipient_id], backref="received_notifications"
@@ -0,0 +1,41 @@
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.query_count = g.get("query_count", 0) + 1
+
+
+def check_query_budget(response):
+    """
+    Compare the number of SQL statements the request ran against its budget.
+    Raises in testing so a route that regresses into N+1 queries fails the suite.
+    """
+    count = g.get("query_count", 0)
+    budget = current_app.config["QUERY_BUDGET"]
+
+    if current_app.debug or current_app.testing:
+        response.headers["X-Query-Count"] = str(count)
+
+    if budget is not None and count > budget:
+        message = f"{request.endpoint} ran {count} queries, budget is {budget}"
+        if current_app.testing:
+            raise QueryBudgetExceeded(message)
+        current_app.logger.warning(message)
+
+    return response
+
+
+def init_query_counter(app):
+    if not event.contains(Engine, "before_cursor_execute", count_query):
+        event.listen(Engine, "before_cursor_execute", count_query)
+
+    app.after_request(check_query_budget)
+
+    return app
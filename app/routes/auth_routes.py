@@ -4,7 +4,8 @@ from werkzeug.security import check_password_hash, generate_password_hash
 from app import db
 from app.routes import auth
 from app.models import User
-from app.helpers import array_to_str, logout_required, upload
+from app.helpers import logout_required, upload
+from app.services.profiles import set_user_classes, set_user_interests, set_user_links
 
 
 @auth.route("/login", methods=["GET", "POST"])
@@ -105,9 +106,9 @@ def complete_profile():
         location = request.form["location"]
         about = request.form["about-me"]
         working_on = request.form["working-on"]
-        interests = array_to_str(request.form.getlist("interests[]"))
-        classes = array_to_str(request.form.getlist("classes[]"))
-        links = array_to_str(request.form.getlist("link[]"))
+        interests = request.form.getlist("interests[]")
+        classes = request.form.getlist("classes[]")
+        links = request.form.getlist("link[]")
 
         # Check required fields exists
         if not name or not surname or not about:
@@ -123,10 +124,10 @@ def complete_profile():
         user.location = location
         user.about = about
         user.working_on = working_on
-        user.interests = interests
-        user.classes = classes
-        user.links = links
         user.is_completed = True
+        set_user_interests(user, interests)
+        set_user_classes(user, classes)
+        set_user_links(user, links)
 
         # Save changes
         try:
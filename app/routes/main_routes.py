@@ -1,23 +1,39 @@
-from markupsafe import Markup
 from app import db
-from flask import flash, g, jsonify, redirect, render_template, request, session, url_for
+from flask import current_app, flash, g, jsonify, redirect, render_template, request, session, url_for
 from werkzeug.security import check_password_hash, generate_password_hash
 from app.errors.handlers import unauthorized
-from app.models import Comment, Like, Message, Notification, NotificationEnum, Post, User
+from app.models import Comment, FriendshipStatusEnum, Like, Notification, NotificationEnum, Post, User
 from app.routes import main
-from app.services.notifications import create_notification, emit_notification, get_all_unread_notifications, get_next_notification, get_notifications, get_unread_notifications, mark_as_read
-from app.helpers import array_to_str, create_notification_link, create_notification_message, format_message_time, format_time_ago, not_found, process_text, upload
-from app.services.queries import get_friends, get_latest_conversations, has_unread_messages
-
-
-
+from app.services.notifications import create_notification, emit_notification, get_all_unread_notifications, get_next_notification, get_notifications, get_unread_notifications, mark_all_as_read, mark_as_read
+from app.helpers import create_notification_link, create_notification_message, format_message_time, format_time_ago, not_found, process_text, upload
+from app.services.conversations import emit_read_receipt, get_conversation_between, get_conversations, get_message_page, mark_conversation_read
+from app.services.counters import decrement_counter, increment_counter
+from app.services.feed import attach_latest_comments, attach_liked_by_user, get_comment_page, get_feed_page, post_loader_options
+from app.services.directory import autocomplete_users, get_directory_page
+from app.services.friendships import REQUEST_RECEIVED, accept_pending_request, are_friends, create_friend_request, decline_pending_request, delete_friendship, delete_user_friendships, get_friendship, get_friendship_statuses, get_received_requests_page, has_friends, invalidate_friendship
+from app.services.message_writer import flush_messages
+from app.services.profiles import MEMBER_LISTS, get_members_page, set_user_classes, set_user_interests, set_user_links
+from app.services.suggestions import delete_user_suggestions, get_suggestions, remove_suggestion_pair, update_suggestions_for_friendship
+from app.services.hashtags import get_tag_page, index_post_hashtags, remove_post_hashtags
+from app.services.trending import WINDOWS, get_trending
+from app.services.timeline import add_friendship_to_timelines, fan_out_post, get_timeline_page, remove_friendship_from_timelines, remove_post_from_timelines
+from app.services.realtime import emit_to_user
+
+
+
+# Load the user and their navbar flags, the unread counters live on the user row
 @main.before_request
 def load_user():
     user_id = session.get("user_id")
+
+    g.user = None
+    g.has_unread_messages = False
+    g.unread_notifications = False
+
     if user_id:
-        g.user = db.get_or_404(User, user_id)  # Load the user or 404 if not found
-    else:
-        g.user = None  # Set to None if no user is in session
+        g.user = db.get_or_404(User, user_id)
+        g.has_unread_messages = g.user.unread_messages > 0
+        g.unread_notifications = g.user.unread_notifications > 0
 
 
 # Instead of passing @login_required routes manually
@@ -26,42 +42,17 @@ def require_login():
     if g.user is None:
         if request.endpoint not in ["login", "register"]:
             return redirect(url_for("auth.login"))
-        
-        
-@main.before_request
-def load_unread_message_status():
-    user_id = session.get("user_id")
-
-    if user_id:
-        current_user = User.query.get(user_id)
-        if current_user:
-            g.has_unread_messages = has_unread_messages(current_user.id)
-        else:
-            g.has_unread_messages = False
-    else:
-        g.has_unread_messages = False
-
-
-@main.before_request
-def load_unread_notifications():
-    user_id = session.get("user_id")
-
-    if user_id:
-        current_user = User.query.get(user_id)
-        if current_user:
-            g.unread_notifications = get_unread_notifications(current_user.id)
-        else:
-            g.unread_notifications = []
-    else:
-        g.unread_notifications = None
 
 
 # Inject user variable to all pages
 # https://flask.palletsprojects.com/en/3.0.x/templating/#context-processors
 @main.app_context_processor
 def inject_user():
+    # Reuse the user loaded for the main blueprint instead of querying again
+    if "user" in g:
+        return dict(current_user=g.user)
     if "user_id" in session:
-        user = User.query.get(session["user_id"])
+        user = db.session.get(User, session["user_id"])
         return dict(current_user=user)
     return {}
 
@@ -91,8 +82,7 @@ def notification_link_converter(notification):
 
 @main.app_template_filter("process_text")
 def process_text_filter(text):
-    processed = process_text(text)
-    return Markup(processed)
+    return process_text(text)
 
 
 @main.after_request
@@ -110,22 +100,57 @@ def after_request(response):
 # Feed
 @main.route("/")
 def index():
-    posts = Post.query.order_by(Post.created_at.desc()).all()
+    posts, next_cursor = get_feed_page()
+
+    attach_latest_comments(posts)
+    attach_liked_by_user(posts, session["user_id"])
+
+    return render_template(
+        "index.html",
+        posts=posts,
+        next_cursor=next_cursor,
+        trending=get_trending("day"),
+        suggestions=get_suggestions(session["user_id"]),
+    )
 
-    # Attach the latest 3 comments to each post
-    for post in posts:
-        post.total_comments = len(post.comments)
-        post.comments = sorted(post.comments, key=lambda x: x.created_at)[:3]
 
-    return render_template("index.html", posts=posts)
+# Next page of the feed for infinite scroll
+@main.route("/feed")
+def feed_page():
+    posts, next_cursor = get_feed_page(request.args.get("cursor"))
+
+    attach_latest_comments(posts)
+    attach_liked_by_user(posts, session["user_id"])
+
+    html = render_template("components/feed.html", posts=posts)
+
+    return jsonify({"html": html, "next_cursor": next_cursor})
 
 
 # Friends feed
 @main.route("/friends")
 def friends():
-    # TODO: Display posts from friends of the user
-    posts = Post.query.all()
-    return render_template("friends.html", posts=posts)
+    posts, next_cursor = get_timeline_page(session["user_id"])
+
+    attach_latest_comments(posts)
+    attach_liked_by_user(posts, session["user_id"])
+
+    return render_template("friends.html", posts=posts, next_cursor=next_cursor)
+
+
+# Next page of the friends feed for infinite scroll
+@main.route("/friends/feed")
+def friends_feed_page():
+    posts, next_cursor = get_timeline_page(
+        session["user_id"], request.args.get("cursor")
+    )
+
+    attach_latest_comments(posts)
+    attach_liked_by_user(posts, session["user_id"])
+
+    html = render_template("components/feed.html", posts=posts)
+
+    return jsonify({"html": html, "next_cursor": next_cursor})
 
 
 """ PROFILES """
@@ -133,9 +158,51 @@ def friends():
 
 @main.route("/profiles")
 def user_list():
-    # Get all users
-    users = User.query.all()
-    return render_template("profiles/list.html", users=users)
+    q = request.args.get("q", "").strip()
+    users, next_after = get_directory_page(q)
+    statuses = get_friendship_statuses(session["user_id"], [user.id for user in users])
+
+    return render_template(
+        "profiles/list.html",
+        users=users,
+        statuses=statuses,
+        q=q,
+        next_after=next_after,
+    )
+
+
+# Next page of the directory for infinite scroll
+@main.route("/users/more")
+def user_list_page():
+    users, next_after = get_directory_page(
+        request.args.get("q", "").strip(), request.args.get("after")
+    )
+    statuses = get_friendship_statuses(session["user_id"], [user.id for user in users])
+
+    html = render_template("components/user_cards.html", users=users, statuses=statuses)
+
+    return jsonify({"html": html, "next_after": next_after})
+
+
+# Search box suggestions, friends=1 only matches the current user's friends
+@main.route("/users/autocomplete")
+def user_autocomplete():
+    friends_of = session["user_id"] if request.args.get("friends") else None
+    users = autocomplete_users(request.args.get("q", ""), friends_of)
+
+    return jsonify(
+        {
+            "users": [
+                {
+                    "username": user.username,
+                    "name": user.name,
+                    "surname": user.surname,
+                    "image": user.image,
+                }
+                for user in users
+            ]
+        }
+    )
 
 
 @main.route("/profiles/<username>")
@@ -145,6 +212,49 @@ def user_profile(username):
     return render_template("profiles/profile.html", user=user)
 
 
+# Everyone who took a class or listed an interest
+@main.route("/<any(classes, interests):kind>/<path:name>/members")
+def tag_members(kind, name):
+    users, next_after = get_members_page(MEMBER_LISTS[kind], name)
+    statuses = get_friendship_statuses(session["user_id"], [user.id for user in users])
+
+    return render_template(
+        "profiles/members.html",
+        kind=kind,
+        name=name,
+        users=users,
+        statuses=statuses,
+        next_after=next_after,
+    )
+
+
+# Next page of members for infinite scroll
+@main.route("/<any(classes, interests):kind>/<path:name>/members/more")
+def tag_members_page(kind, name):
+    users, next_after = get_members_page(
+        MEMBER_LISTS[kind], name, request.args.get("after", type=int)
+    )
+    statuses = get_friendship_statuses(session["user_id"], [user.id for user in users])
+
+    html = render_template("components/user_cards.html", users=users, statuses=statuses)
+
+    return jsonify(
+        {
+            "html": html,
+            "users": [
+                {
+                    "username": user.username,
+                    "name": user.name,
+                    "surname": user.surname,
+                    "image": user.image,
+                }
+                for user in users
+            ],
+            "next_after": next_after,
+        }
+    )
+
+
 """ PROFILE SETTINGS  """
 
 
@@ -162,6 +272,8 @@ def user_delete(id):
     if user.id != session["user_id"]:
         return unauthorized()
 
+    delete_user_friendships(user.id)
+    delete_user_suggestions(user.id)
     db.session.delete(user)
     db.session.commit()
     session.clear()
@@ -251,9 +363,6 @@ def info_settings():
     working_on = request.form.get("working-on")
     interests = request.form.getlist("interests[]")
 
-    # Convert array to string
-    interests_string = array_to_str(interests)
-
     # Update user fields if they have changed
     if location != user.location:
         user.location = location
@@ -264,9 +373,7 @@ def info_settings():
     if working_on != user.working_on:
         user.working_on = working_on
 
-    # Update interests if changed
-    if interests_string != user.interests:
-        user.interests = interests_string
+    set_user_interests(user, interests)
 
     # Commit the changes to the database
     db.session.commit()
@@ -280,13 +387,11 @@ def info_settings():
 def classes_settings():
     selected_classes = request.form.getlist("classes[]")
 
-    classes_string = array_to_str(selected_classes)
-
     # Get the user
     user = db.get_or_404(User, session["user_id"])
 
-    # Update the user's classes field with the new values
-    user.classes = classes_string
+    # Replace the user's classes with the new values
+    set_user_classes(user, selected_classes)
 
     # Save changes to the database
     db.session.commit()
@@ -300,13 +405,11 @@ def classes_settings():
 def links_settings():
     links = request.form.getlist("link[]")
 
-    links_string = array_to_str(links)
-
     # Get the user
     user = db.get_or_404(User, session["user_id"])
 
-    # Update the user's links
-    user.links = links_string
+    # Replace the user's links
+    set_user_links(user, links)
 
     # Save changes to the database
     db.session.commit()
@@ -322,8 +425,11 @@ def links_settings():
 # Post page
 @main.route("/posts/<int:id>")
 def post_page(id):
-    post = Post.query.get_or_404(id)
-    post.total_comments = len(post.comments)
+    post = db.first_or_404(
+        db.select(Post).options(*post_loader_options()).filter_by(id=id)
+    )
+    attach_latest_comments([post])
+    attach_liked_by_user([post], session["user_id"])
     return render_template("post-page.html", post=post)
 
 
@@ -333,6 +439,12 @@ def create_post():
     content = request.form["content"]
     post = Post(content=content, user_id=session["user_id"])
     db.session.add(post)
+    db.session.flush()
+
+    # Deliver the post to friends' timelines in the same transaction
+    fan_out_post(post)
+    index_post_hashtags(post)
+
     db.session.commit()
     return redirect(url_for("main.index"))
 
@@ -342,13 +454,16 @@ def create_post():
 def reshare_post(id):
     current_user = db.get_or_404(User, session["user_id"])
     parent_post = Post.query.get_or_404(id)
-    parent_post.shares += 1
+    increment_counter(Post.shares, parent_post.id)
     content = request.form["content"]
 
     post = Post(content=content, parent_id=parent_post.id, user_id=session["user_id"])
     db.session.add(post)
     db.session.flush()
 
+    fan_out_post(post)
+    index_post_hashtags(post)
+
     # Create a notification for original_post user
     if current_user.id != parent_post.user_id:
         notification = create_notification(
@@ -381,6 +496,12 @@ def delete_post(id):
         flash("You don't have permission to delete this post.", "error")
         return unauthorized()
 
+    remove_post_from_timelines(post.id)
+    remove_post_hashtags(post.id)
+
+    if post.parent_id:
+        decrement_counter(Post.shares, post.parent_id)
+
     db.session.delete(post)
     db.session.commit()
     flash("Post deleted successfully.", "success")
@@ -401,11 +522,13 @@ def like_post(id):
     if like:
         # Unlike the post if already liked
         db.session.delete(like)
+        decrement_counter(Post.like_count, post.id)
         is_liked = False
     else:
         # Like the post
         new_like = Like(user_id=current_user.id, post_id=post.id)
         db.session.add(new_like)
+        increment_counter(Post.like_count, post.id)
         is_liked = True
 
     if current_user.id != post.user_id and not like:
@@ -423,9 +546,7 @@ def like_post(id):
         # Emit notification with SocketIO
         emit_notification(notification)
 
-    like_count = len(post.likes)
-
-    return jsonify({"likes": like_count, "isLiked": is_liked})
+    return jsonify({"likes": post.like_count, "isLiked": is_liked})
 
 
 # Like comment
@@ -441,11 +562,13 @@ def like_comment(id):
     if like:
         # Unlike the comment if already liked
         db.session.delete(like)
+        decrement_counter(Comment.like_count, comment.id)
         is_liked = False
     else:
         # Like the comment
         new_like = Like(user_id=current_user.id, comment_id=comment.id)
         db.session.add(new_like)
+        increment_counter(Comment.like_count, comment.id)
         is_liked = True
 
     # Create a notification for comment's user
@@ -465,9 +588,7 @@ def like_comment(id):
         # Emit notification with SocketIO
         emit_notification(notification)
 
-    like_count = len(comment.likes)
-
-    return jsonify({"likes": like_count, "isLiked": is_liked})
+    return jsonify({"likes": comment.like_count, "isLiked": is_liked})
 
 
 @main.route("/comment/<id>", methods=["POST"])
@@ -482,6 +603,8 @@ def comment_post(id):
     db.session.add(comment)
     db.session.flush()
 
+    increment_counter(Post.comment_count, post.id)
+
     # Create a notification for post user
     if current_user.id != post.user_id:
         notification = create_notification(
@@ -522,6 +645,7 @@ def delete_comment(id):
         flash("You don't have permission to delete this comment.", "error")
         return unauthorized()
 
+    decrement_counter(Post.comment_count, comment.post_id)
     db.session.delete(comment)
     db.session.commit()
     flash("Comment deleted successfully.", "success")
@@ -532,12 +656,7 @@ def delete_comment(id):
 # Load more comments
 @main.route("/post/<id>/comments")
 def load_more_comments(id):
-    page = int(request.args["page"]) + 1
-    comments = (
-        Comment.query.filter_by(post_id=id)
-        .order_by(Comment.created_at.asc())
-        .paginate(page=page, per_page=3)
-    )
+    comments, next_cursor = get_comment_page(id, request.args.get("cursor"))
     comment_list = []
 
     for comment in comments:
@@ -558,7 +677,13 @@ def load_more_comments(id):
         }
         comment_list.append(comment_data)
 
-    return jsonify({"comments": comment_list, "has_next": comments.has_next})
+    return jsonify(
+        {
+            "comments": comment_list,
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
+        }
+    )
 
 
 """ FRIENDS """
@@ -567,17 +692,47 @@ def load_more_comments(id):
 # Requests
 @main.route("/friends/requests")
 def display_friend_requests():
-    user = db.get_or_404(User, session["user_id"])
+    requests, next_cursor = get_received_requests_page(session["user_id"])
+    users = [user for user, requested_at in requests]
+    statuses = {user.id: REQUEST_RECEIVED for user in users}
+
+    return render_template(
+        "profiles/requests.html",
+        users=users,
+        statuses=statuses,
+        next_cursor=next_cursor,
+    )
 
-    received_requests = (
-        User.query.filter(User.id in user.received_requests.split(","))
-        .order_by(User.received_requests.desc())
-        .all()
-        if user.received_requests
-        else []
+
+# Older friend requests for infinite scroll
+@main.route("/friends/requests/more")
+def friend_requests_page():
+    requests, next_cursor = get_received_requests_page(
+        session["user_id"], request.args.get("cursor")
     )
+    users = [user for user, requested_at in requests]
+    statuses = {user.id: REQUEST_RECEIVED for user in users}
 
-    return render_template("profiles/requests.html", users=received_requests)
+    html = render_template(
+        "components/friend_requests.html", users=users, statuses=statuses
+    )
+
+    return jsonify(
+        {
+            "html": html,
+            "requests": [
+                {
+                    "username": user.username,
+                    "name": user.name,
+                    "surname": user.surname,
+                    "image": user.image,
+                    "requested_at": requested_at.isoformat(),
+                }
+                for user, requested_at in requests
+            ],
+            "next_cursor": next_cursor,
+        }
+    )
 
 
 # Send a friend request
@@ -590,22 +745,22 @@ def send_friend_request(username):
         flash("User not found!", "error")
         return "", 200
 
-    if target_user in current_user.friends:
+    friendship = get_friendship(current_user.id, target_user.id)
+
+    if friendship and friendship.status == FriendshipStatusEnum.ACCEPTED:
         flash("You're already friends with this user.", "info")
         return "", 200
 
-    elif target_user in current_user.pending_requests:
+    elif friendship and friendship.requested_by_id == current_user.id:
         flash("Friend request already sent.", "info")
         return "", 200
 
     # Accept the request if current user was already requested by the target user
-    elif current_user in target_user.pending_requests:
-        current_user.friends.append(target_user)
-        target_user.friends.append(current_user)
+    elif friendship:
+        accept_pending_request(current_user.id, target_user.id)
 
-        # Remove pending/received requests
-        current_user.received_requests.remove(target_user)
-        target_user.pending_requests.remove(current_user)
+        add_friendship_to_timelines(current_user.id, target_user.id)
+        update_suggestions_for_friendship(current_user.id, target_user.id)
 
         # Send a friend accept notification to target user
         notification = create_notification(
@@ -614,9 +769,6 @@ def send_friend_request(username):
             notification_type=NotificationEnum.FRIEND_ACCEPTED,
         )
 
-        # Emit notification with SocketIO
-        emit_notification(notification)
-
         # Update friend request notification to read if not read yet
         unread_request = Notification.query.filter(
             Notification.recipient_id == current_user.id,
@@ -628,8 +780,13 @@ def send_friend_request(username):
         # TODO: Test if this works seamlessly
         if unread_request:
             unread_request.is_read = True
+            decrement_counter(User.unread_notifications, current_user.id)
 
         db.session.commit()
+        invalidate_friendship(current_user.id, target_user.id)
+
+        # Emit notification with SocketIO
+        emit_notification(notification)
 
         flash(
             f"You are now friends with {target_user.name} {target_user.surname}.",
@@ -637,8 +794,8 @@ def send_friend_request(username):
         )
         return "", 200
 
-    current_user.pending_requests.append(target_user)
-    target_user.received_requests.append(current_user)
+    create_friend_request(current_user.id, target_user.id)
+    remove_suggestion_pair(current_user.id, target_user.id)
 
     # Send a friend request notification to target user
     notification = create_notification(
@@ -664,17 +821,16 @@ def accept_friend_request(username):
     current_user = db.get_or_404(User, session["user_id"])
     target_user = User.query.filter_by(username=username).one_or_404()
 
-    if target_user in current_user.friends:
-        flash("You're already friends with this user.", "info")
+    # One UPDATE, no rows means there was no pending request from target_user
+    if not accept_pending_request(current_user.id, target_user.id):
+        if are_friends(current_user.id, target_user.id):
+            flash("You're already friends with this user.", "info")
+        else:
+            flash("No friend request from this user.", "info")
         return "", 200
 
-    # Accept the request if current user was already requested by the target user
-    current_user.friends.append(target_user)
-    target_user.friends.append(current_user)
-
-    # Remove pending/received requests
-    current_user.received_requests.remove(target_user)
-    target_user.pending_requests.remove(current_user)
+    add_friendship_to_timelines(current_user.id, target_user.id)
+    update_suggestions_for_friendship(current_user.id, target_user.id)
 
     # Send a notification
     notification = create_notification(
@@ -683,9 +839,6 @@ def accept_friend_request(username):
         notification_type=NotificationEnum.FRIEND_ACCEPTED,
     )
 
-    # Emit notification with SocketIO
-    emit_notification(notification)
-
     # Update friend request notification to read if not read yet
     unread_request = Notification.query.filter(
         Notification.recipient_id == current_user.id,
@@ -697,8 +850,13 @@ def accept_friend_request(username):
     # TODO: Test if this works seamlessly
     if unread_request:
         unread_request.is_read = True
+        decrement_counter(User.unread_notifications, current_user.id)
 
     db.session.commit()
+    invalidate_friendship(current_user.id, target_user.id)
+
+    # Emit notification with SocketIO
+    emit_notification(notification)
 
     flash(
         f"You're now friends with {target_user.name} {target_user.surname}.", "success"
@@ -712,14 +870,14 @@ def decline_friend_request(username):
     current_user = db.get_or_404(User, session["user_id"])
     target_user = User.query.filter_by(username=username).one_or_404()
 
-    if target_user in current_user.friends:
-        flash("You're already friends with this user.", "info")
+    # Only a pending request from target_user is deleted, never a friendship
+    if not decline_pending_request(current_user.id, target_user.id):
+        if are_friends(current_user.id, target_user.id):
+            flash("You're already friends with this user.", "info")
+        else:
+            flash("No friend request from this user.", "info")
         return "", 200
 
-    # Remove pending/received requests
-    current_user.received_requests.remove(target_user)
-    target_user.pending_requests.remove(current_user)
-
     db.session.commit()
 
     flash(
@@ -735,15 +893,15 @@ def remove_friend(username):
     current_user = db.get_or_404(User, session["user_id"])
     target_user = User.query.filter_by(username=username).one_or_404()
 
-    if target_user not in current_user.friends:
+    if not delete_friendship(current_user.id, target_user.id):
         flash("You're not friends with this user.", "info")
         return "", 200
 
-    # Remove pending/received requests
-    current_user.friends.remove(target_user)
-    target_user.friends.remove(current_user)
+    remove_friendship_from_timelines(current_user.id, target_user.id)
+    update_suggestions_for_friendship(current_user.id, target_user.id)
 
     db.session.commit()
+    invalidate_friendship(current_user.id, target_user.id)
 
     flash(f"{target_user.name} {target_user.surname} removed from friends.", "success")
     return jsonify({"username": target_user.username, "status": "success"})
@@ -755,28 +913,19 @@ def remove_friend(username):
 # Start a new conversation
 @main.route("/messages/new")
 def start_conversation():
-    friends_data = get_friends(session["user_id"])
-    friends = []
-    for friend_data in friends_data:
-        friend_json = {
-            "id": friend_data.id,
-            "username": friend_data.username,
-            "name": friend_data.name,
-            "surname": friend_data.surname,
-            "image": friend_data.image,
-        }
-        friends.append(friend_json)
-
-    return render_template("messages/create_message.html", friends=friends)
+    # Friends are looked up as the user types, see user_autocomplete
+    return render_template(
+        "messages/create_message.html", has_friends=has_friends(session["user_id"])
+    )
 
 
 # Messages page
 @main.route("/messages")
 def view_messages():
     current_user = db.get_or_404(User, session["user_id"])
-    messages = get_latest_conversations(current_user.id)
+    conversations = get_conversations(current_user.id)
 
-    return render_template("messages/index.html", messages=messages)
+    return render_template("messages/index.html", conversations=conversations)
 
 
 # Single message page
@@ -790,35 +939,28 @@ def view_conversation(username):
         flash("You can't chat with yourself!", "error")
         return redirect(url_for("main.view_messages"))
 
-    # Limit the initial number of messages to load, for example, the latest 20
-    message_limit = 20
-
-    # Fetch initial messages between current user and friend
-    messages = (
-        Message.query.filter(
-            (
-                (Message.sender_id == current_user.id)
-                & (Message.recipient_id == friend.id)
-            )
-            | (
-                (Message.sender_id == friend.id)
-                & (Message.recipient_id == current_user.id)
-            )
-        )
-        .order_by(Message.created_at.desc())
-        .limit(message_limit)
-        .all()
-    )
+    # Latest page of messages, newest first
+    messages, next_cursor = get_message_page(current_user.id, friend.id)
 
     # Reverse to show from oldest to newest after limiting
     messages.reverse()
 
     if messages:
+        # Read receipt of the friend, shown under our own last message
+        conversation = get_conversation_between(current_user.id, friend.id)
+        last_message = messages[-1]
+        seen = (
+            conversation is not None
+            and last_message.sender_id == current_user.id
+            and (conversation.last_read_for(friend.id) or 0) >= last_message.id
+        )
+
         return render_template(
             "messages/conversation.html",
             messages=messages,
             friend=friend,
-            has_more=len(messages) == message_limit,
+            next_cursor=next_cursor,
+            seen=seen,
         )
     else:
         return not_found()
@@ -835,24 +977,9 @@ def load_more_conversation(username):
         flash("You can't chat with yourself!", "error")
         return redirect(url_for("main.view_messages"))
 
-    # Limit the initial number of messages to load
-    message_limit = 20
-    page = int(request.args["page"]) + 1
-
-    # Fetch initial messages between current user and friend
-    messages = (
-        Message.query.filter(
-            (
-                (Message.sender_id == current_user.id)
-                & (Message.recipient_id == friend.id)
-            )
-            | (
-                (Message.sender_id == friend.id)
-                & (Message.recipient_id == current_user.id)
-            )
-        )
-        .order_by(Message.created_at.desc())
-        .paginate(page=page, per_page=message_limit)
+    # Older messages than the cursor, newest first
+    messages, next_cursor = get_message_page(
+        current_user.id, friend.id, request.args.get("cursor")
     )
 
     message_list = []
@@ -873,7 +1000,13 @@ def load_more_conversation(username):
         }
         message_list.append(message_data)
 
-    return jsonify({"messages": message_list, "has_next": messages.has_next})
+    return jsonify(
+        {
+            "messages": message_list,
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
+        }
+    )
 
 
 # Update read status
@@ -887,22 +1020,25 @@ def mark_messages_as_read(username):
         flash("You can't chat with yourself!", "error")
         return redirect(url_for("main.view_messages"))
 
-    unread_messages = Message.query.filter(
-        Message.sender_id == friend.id,
-        Message.recipient_id == current_user.id,
-        Message.is_read == False,
-    )
-
-    for message in unread_messages:
-        message.is_read = True
+    # Messages still queued by the write-behind writer would stay unread
+    if current_app.config["MESSAGE_WRITE_BEHIND"]:
+        flush_messages()
 
-    other_unread_messages = Message.query.filter(
-        Message.recipient_id == current_user.id, Message.is_read == False
-    ).count()
+    # One UPDATE for the whole backlog instead of one per message
+    marked, last_read_message_id = mark_conversation_read(current_user.id, friend.id)
 
     db.session.commit()
+
+    if marked:
+        emit_read_receipt(current_user.id, friend.id, last_read_message_id)
+
+        # Clear the messages badge in the user's other tabs
+        if current_user.unread_messages == 0:
+            emit_to_user(current_user.id, "no_unread_messages", {})
+
+    # O(1) read of the counter instead of counting unread messages
     return jsonify(
-        {"success": True, "other_unread_messages": other_unread_messages > 0}
+        {"success": True, "other_unread_messages": current_user.unread_messages > 0}
     )
 
 
@@ -932,9 +1068,7 @@ def unread_notifications():
 
 @main.route("/notifications/<int:notification_id>/read", methods=["POST"])
 def mark_notification_read(notification_id):
-    notification = mark_as_read(notification_id, session["user_id"])
-
-    if not notification:
+    if not mark_as_read(notification_id, session["user_id"]):
         flash("Notification not found!", "error")
         return jsonify({"status": "error", "message": "Notification not found"}), 404
 
@@ -958,24 +1092,41 @@ def next_unread_notification():
 @main.route("/notifications/mark-all-read", methods=["POST"])
 def mark_all_notifications_read():
     current_user = db.get_or_404(User, session["user_id"])
-    Notification.query.filter_by(recipient_id=current_user.id, is_read=False).update(
-        {Notification.is_read: True}
-    )
-    db.session.commit()
+    mark_all_as_read(current_user.id)
     return jsonify({"status": "success"})
 
 
 # Hashtag page
 @main.route("/tags/<string:tag>")
 def tag_view(tag):
-    pattern = f"%#{tag}%"
+    posts, next_cursor = get_tag_page(tag)
 
-    posts = (
-        Post.query.filter(Post.content.ilike(pattern)).order_by(Post.id.desc()).all()
-    )
+    attach_latest_comments(posts)
+    attach_liked_by_user(posts, session["user_id"])
+
+    return render_template("tags.html", posts=posts, tag=tag, next_cursor=next_cursor)
+
+
+# Next page of a hashtag for infinite scroll
+@main.route("/tags/<string:tag>/feed")
+def tag_feed_page(tag):
+    posts, next_cursor = get_tag_page(tag, request.args.get("cursor"))
+
+    attach_latest_comments(posts)
+    attach_liked_by_user(posts, session["user_id"])
+
+    html = render_template("components/feed.html", posts=posts)
+
+    return jsonify({"html": html, "next_cursor": next_cursor})
+
+
+# Trending hashtags
+@main.route("/trending")
+def trending_tags():
+    window = request.args.get("window", "day")
+    limit = max(1, min(request.args.get("limit", 10, type=int), 50))
 
-    for post in posts:
-        post.total_comments = len(post.comments)
-        post.comments = sorted(post.comments, key=lambda x: x.created_at)[:3]
+    if window not in WINDOWS:
+        return jsonify({"error": "window must be one of hour, day, week"}), 400
 
-    return render_template("tags.html", posts=posts, tag=tag)
+    return jsonify({"window": window, "tags": get_trending(window, limit)})
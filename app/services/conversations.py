@@ -0,0 +1,229 @@
+from flask import current_app
+from sqlalchemy import and_, case, delete, func, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models import Conversation, Message, User
+from app.services.counters import decrement_counter
+from app.services.feed import paginate_keyset
+from app.services.realtime import emit_to_users
+
+
+def conversation_pair(user_id, other_user_id):
+    """Ordered (user1_id, user2_id) key of the conversation between two users"""
+    return min(user_id, other_user_id), max(user_id, other_user_id)
+
+
+def record_message(message):
+    """Point the conversation of a flushed message at it and count it as unread"""
+    record_messages([message])
+
+
+def upsert(model):
+    """INSERT of the database's dialect, the generic one has no ON CONFLICT"""
+    if db.engine.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def record_messages(messages):
+    """
+    Point every conversation touched by a batch of flushed messages at its
+    newest one and count them as unread, one upsert per conversation so two
+    workers starting the same conversation don't both try to create it
+    """
+    batches = {}
+    for message in messages:
+        pair = conversation_pair(message.sender_id, message.recipient_id)
+        last_message_id, unread = batches.get(pair, (0, {pair[0]: 0, pair[1]: 0}))
+        unread[message.recipient_id] += 1
+        batches[pair] = (max(last_message_id, message.id), unread)
+
+    for (user1_id, user2_id), (last_message_id, unread) in batches.items():
+        # Same format as the message row, see fan_out_post
+        created_at = (
+            select(Message.created_at)
+            .where(Message.id == last_message_id)
+            .scalar_subquery()
+        )
+
+        statement = upsert(Conversation).values(
+            {
+                Conversation.user1_id: user1_id,
+                Conversation.user2_id: user2_id,
+                Conversation.last_message_id: last_message_id,
+                Conversation.last_activity_at: created_at,
+                Conversation.user1_unread: unread[user1_id],
+                Conversation.user2_unread: unread[user2_id],
+            }
+        )
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[Conversation.user1_id, Conversation.user2_id],
+                set_={
+                    Conversation.last_message_id: statement.excluded.last_message_id,
+                    Conversation.last_activity_at: statement.excluded.last_activity_at,
+                    Conversation.user1_unread: Conversation.user1_unread
+                    + statement.excluded.user1_unread,
+                    Conversation.user2_unread: Conversation.user2_unread
+                    + statement.excluded.user2_unread,
+                },
+            )
+        )
+
+
+def mark_conversation_read(user_id, other_user_id):
+    """
+    Mark every unread message from other_user as read with one UPDATE and move
+    the read receipt of user_id to the latest message of the conversation.
+    Returns (marked, last_read_message_id).
+    """
+    result = db.session.execute(
+        update(Message)
+        .where(
+            Message.sender_id == other_user_id,
+            Message.recipient_id == user_id,
+            Message.is_read == False,
+        )
+        .values(is_read=True)
+    )
+    marked = result.rowcount
+
+    if marked:
+        decrement_counter(User.unread_messages, user_id, marked)
+
+    user1_id, user2_id = conversation_pair(user_id, other_user_id)
+    if user_id == user1_id:
+        unread = Conversation.user1_unread
+        last_read = Conversation.user1_last_read_message_id
+    else:
+        unread = Conversation.user2_unread
+        last_read = Conversation.user2_last_read_message_id
+
+    last_read_message_id = db.session.execute(
+        update(Conversation)
+        .where(Conversation.user1_id == user1_id, Conversation.user2_id == user2_id)
+        .values({unread: 0, last_read: Conversation.last_message_id})
+        .returning(Conversation.last_message_id)
+    ).scalar()
+
+    return marked, last_read_message_id
+
+
+def get_conversation_between(user_id, other_user_id):
+    user1_id, user2_id = conversation_pair(user_id, other_user_id)
+    return Conversation.query.filter_by(user1_id=user1_id, user2_id=user2_id).first()
+
+
+def emit_read_receipt(reader_id, sender_id, last_read_message_id):
+    """
+    Tell the sender up to which message the reader has seen, the reader's
+    other tabs get the same event to clear their unread markers
+    """
+    emit_to_users(
+        [reader_id, sender_id],
+        "messages_read",
+        {
+            "reader_id": reader_id,
+            "sender_id": sender_id,
+            "last_read_message_id": last_read_message_id,
+        },
+    )
+
+
+# Inbox of a user, newest activity first
+def get_conversations(user_id):
+    return (
+        Conversation.query.options(
+            joinedload(Conversation.user1),
+            joinedload(Conversation.user2),
+            joinedload(Conversation.last_message),
+        )
+        .filter(or_(Conversation.user1_id == user_id, Conversation.user2_id == user_id))
+        .order_by(Conversation.last_activity_at.desc(), Conversation.id.desc())
+        .all()
+    )
+
+
+# Messages between two users, newest first
+def get_message_page(user_id, other_user_id, cursor=None, limit=None):
+    query = Message.query.options(joinedload(Message.sender)).filter(
+        or_(
+            and_(Message.sender_id == user_id, Message.recipient_id == other_user_id),
+            and_(Message.sender_id == other_user_id, Message.recipient_id == user_id),
+        )
+    )
+
+    return paginate_keyset(
+        query,
+        Message.created_at,
+        Message.id,
+        cursor,
+        limit or current_app.config["MESSAGE_PAGE_SIZE"],
+    )
+
+
+def rebuild_conversations():
+    """Rebuild every conversation from the message table, returns the row count"""
+    db.session.execute(delete(Conversation))
+
+    user1_id = case(
+        (Message.sender_id < Message.recipient_id, Message.sender_id),
+        else_=Message.recipient_id,
+    )
+    user2_id = case(
+        (Message.sender_id > Message.recipient_id, Message.sender_id),
+        else_=Message.recipient_id,
+    )
+
+    def unread_of(participant_id):
+        return func.sum(
+            case(
+                (
+                    and_(
+                        Message.recipient_id == participant_id,
+                        Message.is_read == False,
+                    ),
+                    1,
+                ),
+                else_=0,
+            )
+        )
+
+    pairs = (
+        select(
+            user1_id.label("user1_id"),
+            user2_id.label("user2_id"),
+            func.max(Message.id).label("last_message_id"),
+            unread_of(user1_id).label("user1_unread"),
+            unread_of(user2_id).label("user2_unread"),
+        )
+        .group_by(user1_id, user2_id)
+        .subquery()
+    )
+
+    conversations = select(
+        pairs.c.user1_id,
+        pairs.c.user2_id,
+        pairs.c.last_message_id,
+        Message.created_at,
+        pairs.c.user1_unread,
+        pairs.c.user2_unread,
+    ).join(Message, Message.id == pairs.c.last_message_id)
+
+    result = db.session.execute(
+        insert(Conversation).from_select(
+            [
+                "user1_id",
+                "user2_id",
+                "last_message_id",
+                "last_activity_at",
+                "user1_unread",
+                "user2_unread",
+            ],
+            conversations,
+        )
+    )
+
+    return result.rowcount
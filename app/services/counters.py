@@ -0,0 +1,93 @@
+from sqlalchemy import func, select, update
+
+from app import db
+from app.models import Comment, Conversation, Like, Message, Notification, Post, User
+
+
+def increment_counter(column, id, amount=1):
+    """Atomically add amount to a counter column, e.g. increment_counter(Post.like_count, post.id)"""
+    model = column.class_
+    db.session.execute(
+        update(model).where(model.id == id).values({column: column + amount})
+    )
+
+
+def decrement_counter(column, id, amount=1):
+    increment_counter(column, id, -amount)
+
+
+def reconcile_counters():
+    """
+    Recompute every denormalized counter from the source tables.
+    Only drifted rows are written, returns the number of repaired rows per counter.
+    """
+    post_likes = (
+        select(func.count(Like.id)).where(Like.post_id == Post.id).scalar_subquery()
+    )
+    post_comments = (
+        select(func.count(Comment.id))
+        .where(Comment.post_id == Post.id)
+        .scalar_subquery()
+    )
+    reshare = db.aliased(Post)
+    post_shares = (
+        select(func.count(reshare.id))
+        .where(reshare.parent_id == Post.id)
+        .scalar_subquery()
+    )
+    comment_likes = (
+        select(func.count(Like.id))
+        .where(Like.comment_id == Comment.id)
+        .scalar_subquery()
+    )
+
+    unread_messages = (
+        select(func.count(Message.id))
+        .where(Message.recipient_id == User.id, Message.is_read == False)
+        .scalar_subquery()
+    )
+    unread_notifications = (
+        select(func.count(Notification.id))
+        .where(Notification.recipient_id == User.id, Notification.is_read == False)
+        .scalar_subquery()
+    )
+
+    def conversation_unread(recipient_id, sender_id):
+        return (
+            select(func.count(Message.id))
+            .where(
+                Message.recipient_id == recipient_id,
+                Message.sender_id == sender_id,
+                Message.is_read == False,
+            )
+            .scalar_subquery()
+        )
+
+    counters = {
+        "post.like_count": (Post.like_count, post_likes),
+        "post.comment_count": (Post.comment_count, post_comments),
+        "post.shares": (Post.shares, post_shares),
+        "comment.like_count": (Comment.like_count, comment_likes),
+        "user.unread_messages": (User.unread_messages, unread_messages),
+        "user.unread_notifications": (User.unread_notifications, unread_notifications),
+        "conversation.user1_unread": (
+            Conversation.user1_unread,
+            conversation_unread(Conversation.user1_id, Conversation.user2_id),
+        ),
+        "conversation.user2_unread": (
+            Conversation.user2_unread,
+            conversation_unread(Conversation.user2_id, Conversation.user1_id),
+        ),
+    }
+
+    repaired = {}
+    for name, (column, actual) in counters.items():
+        model = column.class_
+        result = db.session.execute(
+            update(model)
+            .where(db.or_(column.is_(None), column != actual))
+            .values({column: actual})
+        )
+        repaired[name] = result.rowcount
+
+    return repaired
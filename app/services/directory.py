@@ -0,0 +1,99 @@
+import sys
+
+from flask import current_app
+from sqlalchemy import and_, func, or_, select, union
+
+from app.models import User
+from app.services.friendships import friend_ids_select
+from app.services.profiles import profile_list_options
+
+# Columns searched by prefix, each has a lower() expression index
+SEARCH_COLUMNS = (User.username, User.name, User.surname)
+
+
+def search_terms(q):
+    """Lowercased words of a search query, at most three"""
+    return (q or "").lower().split()[:3]
+
+
+def prefix_range(expression, prefix):
+    """
+    expression starts with prefix, as a range the expression's index can scan.
+    A LIKE 'prefix%' only uses an index under a case-insensitive collation.
+    """
+    last = ord(prefix[-1]) + 1
+
+    # No character comes after the last code point to close the range
+    if last > sys.maxunicode:
+        return expression.startswith(prefix, autoescape=True)
+
+    # Surrogates can't be encoded, the next character is the first one after them
+    if 0xD800 <= last <= 0xDFFF:
+        last = 0xE000
+
+    return and_(expression >= prefix, expression < prefix[:-1] + chr(last))
+
+
+def term_filter(term):
+    """One word of the query matches the start of username, name or surname"""
+    return or_(
+        *(prefix_range(func.lower(column), term) for column in SEARCH_COLUMNS)
+    )
+
+
+def get_directory_page(q=None, after=None, limit=None):
+    """
+    Users ordered by username, every word of q matching the start of their
+    username, name or surname. after is the last username of the previous
+    page. Returns (users, next_after).
+    """
+    limit = limit or current_app.config["DIRECTORY_PAGE_SIZE"]
+
+    query = User.query.options(*profile_list_options()).order_by(User.username)
+    for term in search_terms(q):
+        query = query.filter(term_filter(term))
+    if after:
+        query = query.filter(User.username > after)
+
+    # Fetch one extra row to know if there's a next page
+    users = query.limit(limit + 1).all()
+    next_after = users[limit - 1].username if len(users) > limit else None
+
+    return users[:limit], next_after
+
+
+def autocomplete_users(q, friends_of=None, limit=None):
+    """
+    Best matches for a search box, the first word of q is looked up in the
+    username, name and surname indexes separately, limit rows from each, so
+    the cost doesn't grow with the number of users sharing a short prefix.
+    friends_of restricts the matches to the friends of that user.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return []
+
+    limit = limit or current_app.config["AUTOCOMPLETE_LIMIT"]
+    filters = [term_filter(term) for term in terms[1:]]
+    if friends_of is not None:
+        filters.append(User.id.in_(friend_ids_select(friends_of)))
+
+    branches = []
+    for column in SEARCH_COLUMNS:
+        expression = func.lower(column)
+        branch = (
+            select(User.id)
+            .where(prefix_range(expression, terms[0]), *filters)
+            .order_by(expression)
+            .limit(limit)
+            .subquery()
+        )
+        branches.append(select(branch.c.id))
+
+    matches = union(*branches).subquery()
+    return (
+        User.query.join(matches, User.id == matches.c.id)
+        .order_by(User.name, User.surname, User.username)
+        .limit(limit)
+        .all()
+    )
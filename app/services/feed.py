@@ -0,0 +1,182 @@
+from flask import current_app
+from sqlalchemy.orm import joinedload, selectinload
+
+from app import db
+from app.helpers import decode_cursor, encode_cursor
+from app.models import Comment, Like, Post
+
+
+def post_loader_options():
+    """Eager load everything components/post.html touches, in a fixed number of queries"""
+    return (
+        joinedload(Post.user),
+        selectinload(Post.original_post).joinedload(Post.user),
+    )
+
+
+def keyset_filter(query, column, id_column, cursor, descending=True):
+    """Restrict a (column, id) ordered query to rows after the cursor"""
+    position = decode_cursor(cursor)
+
+    if position is None:
+        return query
+
+    created_at, id = position
+
+    # SQLite stores func.now() defaults without microseconds while bound datetimes
+    # carry them, normalize the bound value so equal timestamps compare equal
+    if db.engine.dialect.name == "sqlite":
+        created_at = db.func.datetime(created_at)
+
+    if descending:
+        return query.filter(
+            db.or_(
+                column < created_at,
+                db.and_(column == created_at, id_column < id),
+            )
+        )
+
+    return query.filter(
+        db.or_(
+            column > created_at,
+            db.and_(column == created_at, id_column > id),
+        )
+    )
+
+
+def paginate_keyset(
+    query, column, id_column, cursor=None, limit=None, key=None, descending=True
+):
+    """
+    Fetch one page of a query ordered by (column desc, id desc),
+    or (column asc, id asc) when descending is False.
+    key returns the (created_at, id) pair of a row when the ordering columns
+    don't belong to the selected entity.
+    Returns (rows, next_cursor), next_cursor is None on the last page.
+    """
+    limit = limit or current_app.config["FEED_PAGE_SIZE"]
+    key = key or (lambda row: (getattr(row, column.key), getattr(row, id_column.key)))
+
+    order_by = (
+        (column.desc(), id_column.desc()) if descending else (column, id_column)
+    )
+
+    rows = (
+        keyset_filter(query, column, id_column, cursor, descending)
+        .order_by(*order_by)
+        .limit(limit + 1)
+        .all()
+    )
+
+    # One extra row tells us whether there is another page without a COUNT
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*key(rows[-1]))
+
+    return rows, next_cursor
+
+
+# Home feed, newest first
+def get_feed_page(cursor=None, limit=None):
+    query = Post.query.options(*post_loader_options())
+    return paginate_keyset(query, Post.created_at, Post.id, cursor, limit)
+
+
+def get_first_comments(post_ids, limit=3):
+    """
+    Fetch the first comments of every post in one query, ranking them per post
+    with ROW_NUMBER() instead of loading whole comment collections.
+    """
+    if not post_ids:
+        return []
+
+    ranked = (
+        db.select(
+            Comment.id,
+            db.func.row_number()
+            .over(
+                partition_by=Comment.post_id,
+                order_by=(Comment.created_at, Comment.id),
+            )
+            .label("position"),
+        )
+        .where(Comment.post_id.in_(post_ids))
+        .subquery()
+    )
+
+    return (
+        Comment.query.options(joinedload(Comment.user))
+        .join(ranked, ranked.c.id == Comment.id)
+        .filter(ranked.c.position <= limit)
+        .order_by(Comment.post_id, Comment.created_at, Comment.id)
+        .all()
+    )
+
+
+# Comments of a post after the previews, oldest first
+def get_comment_page(post_id, cursor=None, limit=None):
+    query = Comment.query.options(joinedload(Comment.user)).filter(
+        Comment.post_id == post_id
+    )
+
+    return paginate_keyset(
+        query,
+        Comment.created_at,
+        Comment.id,
+        cursor,
+        limit or current_app.config["COMMENT_PAGE_SIZE"],
+        descending=False,
+    )
+
+
+# Attach the first 3 comments to each post
+def attach_latest_comments(posts):
+    comments_by_post = {post.id: [] for post in posts}
+
+    for comment in get_first_comments(list(comments_by_post)):
+        comments_by_post[comment.post_id].append(comment)
+
+    # Plain attribute, assigning to the comments relationship would mark
+    # the rest of the collection as orphans to be deleted on the next flush
+    for post in posts:
+        post.preview_comments = comments_by_post[post.id]
+
+        # Where "load more comments" continues from
+        post.comments_cursor = None
+        if post.preview_comments and post.comment_count > len(post.preview_comments):
+            last = post.preview_comments[-1]
+            post.comments_cursor = encode_cursor(last.created_at, last.id)
+
+
+def get_liked_ids(user_id, post_ids, comment_ids):
+    """Return the ids of the given posts and comments the user liked, in one query"""
+    if not post_ids and not comment_ids:
+        return set(), set()
+
+    likes = db.session.execute(
+        db.select(Like.post_id, Like.comment_id).where(
+            Like.user_id == user_id,
+            db.or_(Like.post_id.in_(post_ids), Like.comment_id.in_(comment_ids)),
+        )
+    ).all()
+
+    liked_post_ids = {like.post_id for like in likes if like.post_id}
+    liked_comment_ids = {like.comment_id for like in likes if like.comment_id}
+
+    return liked_post_ids, liked_comment_ids
+
+
+# Mark the posts and comments on the page the user liked
+def attach_liked_by_user(posts, user_id):
+    comments = [comment for post in posts for comment in post.preview_comments]
+
+    liked_post_ids, liked_comment_ids = get_liked_ids(
+        user_id, [post.id for post in posts], [comment.id for comment in comments]
+    )
+
+    for post in posts:
+        post.is_liked = post.id in liked_post_ids
+
+    for comment in comments:
+        comment.is_liked = comment.id in liked_comment_ids
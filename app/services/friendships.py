@@ -0,0 +1,214 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import case, delete, exists, insert, or_, select, update
+
+from app import db
+from app.models import Friendship, FriendshipStatusEnum, User
+from app.services.feed import paginate_keyset
+from app.services.profiles import profile_list_options
+
+# (user_a_id, user_b_id) -> (expires_at, are_friends), least recently used first.
+# Per process, the TTL bounds how long another worker can answer from a
+# friendship that changed elsewhere
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Relation of another user to the current one, see get_friendship_statuses
+FRIENDS = "friends"
+REQUEST_SENT = "sent"
+REQUEST_RECEIVED = "received"
+
+
+def friendship_key(user_id, other_user_id):
+    """Ordered (user_a_id, user_b_id) key of the friendship between two users"""
+    return min(user_id, other_user_id), max(user_id, other_user_id)
+
+
+def pair_filter(user_id, other_user_id):
+    user_a_id, user_b_id = friendship_key(user_id, other_user_id)
+    return (Friendship.user_a_id == user_a_id) & (Friendship.user_b_id == user_b_id)
+
+
+def friend_id_column(user_id):
+    """The other side of a friendship row of user_id"""
+    return case(
+        (Friendship.user_a_id == user_id, Friendship.user_b_id),
+        else_=Friendship.user_a_id,
+    )
+
+
+def friend_ids_select(user_id):
+    """SELECT of the ids of user_id's friends, for joins and subqueries"""
+    return select(friend_id_column(user_id).label("friend_id")).where(
+        or_(Friendship.user_a_id == user_id, Friendship.user_b_id == user_id),
+        Friendship.status == FriendshipStatusEnum.ACCEPTED,
+    )
+
+
+def get_friendship(user_id, other_user_id):
+    return db.session.execute(
+        select(Friendship).where(pair_filter(user_id, other_user_id))
+    ).scalar()
+
+
+def has_friends(user_id):
+    return db.session.execute(
+        select(exists(friend_ids_select(user_id)))
+    ).scalar()
+
+
+def get_received_requests_page(user_id, cursor=None, limit=None):
+    """
+    Users with a pending request to user_id and when they sent it, newest
+    first, in one SELECT over the (user, status, created_at) indexes.
+    Returns ([(user, requested_at)], next_cursor).
+    """
+    query = (
+        db.session.query(User, Friendship.created_at)
+        .options(*profile_list_options())
+        .join(Friendship, Friendship.requested_by_id == User.id)
+        .filter(
+            or_(Friendship.user_a_id == user_id, Friendship.user_b_id == user_id),
+            Friendship.status == FriendshipStatusEnum.PENDING,
+            Friendship.requested_by_id != user_id,
+        )
+    )
+
+    return paginate_keyset(
+        query,
+        Friendship.created_at,
+        Friendship.requested_by_id,
+        cursor,
+        limit or current_app.config["FRIEND_REQUEST_PAGE_SIZE"],
+        key=lambda row: (row.created_at, row.User.id),
+    )
+
+
+def get_friendship_statuses(user_id, other_user_ids):
+    """
+    Relation of user_id to each of other_user_ids in one query:
+    FRIENDS, REQUEST_SENT, REQUEST_RECEIVED, missing ids are strangers
+    """
+    other_user_ids = [other for other in set(other_user_ids) if other != user_id]
+    if not other_user_ids:
+        return {}
+
+    other_id = friend_id_column(user_id)
+    rows = db.session.execute(
+        select(other_id, Friendship.status, Friendship.requested_by_id).where(
+            or_(Friendship.user_a_id == user_id, Friendship.user_b_id == user_id),
+            other_id.in_(other_user_ids),
+        )
+    )
+
+    statuses = {}
+    for other, status, requested_by_id in rows:
+        if status == FriendshipStatusEnum.ACCEPTED:
+            statuses[other] = FRIENDS
+        elif requested_by_id == user_id:
+            statuses[other] = REQUEST_SENT
+        else:
+            statuses[other] = REQUEST_RECEIVED
+
+    return statuses
+
+
+def create_friend_request(user_id, other_user_id):
+    user_a_id, user_b_id = friendship_key(user_id, other_user_id)
+    db.session.execute(
+        insert(Friendship).values(
+            user_a_id=user_a_id,
+            user_b_id=user_b_id,
+            status=FriendshipStatusEnum.PENDING,
+            requested_by_id=user_id,
+        )
+    )
+
+
+def accept_pending_request(user_id, requester_id):
+    """Accept the pending request requester_id sent to user_id, returns True if there was one"""
+    result = db.session.execute(
+        update(Friendship)
+        .where(
+            pair_filter(user_id, requester_id),
+            Friendship.status == FriendshipStatusEnum.PENDING,
+            Friendship.requested_by_id == requester_id,
+        )
+        .values(status=FriendshipStatusEnum.ACCEPTED)
+    )
+    return result.rowcount > 0
+
+
+def decline_pending_request(user_id, requester_id):
+    """Drop the pending request requester_id sent to user_id, returns True if there was one"""
+    result = db.session.execute(
+        delete(Friendship).where(
+            pair_filter(user_id, requester_id),
+            Friendship.status == FriendshipStatusEnum.PENDING,
+            Friendship.requested_by_id == requester_id,
+        )
+    )
+    return result.rowcount > 0
+
+
+def delete_friendship(user_id, friend_id):
+    """Unfriend two users, returns True if they were friends"""
+    result = db.session.execute(
+        delete(Friendship).where(
+            pair_filter(user_id, friend_id),
+            Friendship.status == FriendshipStatusEnum.ACCEPTED,
+        )
+    )
+    return result.rowcount > 0
+
+
+def delete_user_friendships(user_id):
+    """Friendships and requests of a deleted user"""
+    db.session.execute(
+        delete(Friendship).where(
+            or_(Friendship.user_a_id == user_id, Friendship.user_b_id == user_id)
+        )
+    )
+
+
+def query_are_friends(user_id, other_user_id):
+    """One primary key lookup on the friendship pair"""
+    return db.session.execute(
+        select(
+            exists().where(
+                pair_filter(user_id, other_user_id),
+                Friendship.status == FriendshipStatusEnum.ACCEPTED,
+            )
+        )
+    ).scalar()
+
+
+def are_friends(user_id, other_user_id):
+    key = friendship_key(user_id, other_user_id)
+    now = time.monotonic()
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] > now:
+            _cache.move_to_end(key)
+            return cached[1]
+
+    result = query_are_friends(user_id, other_user_id)
+
+    with _cache_lock:
+        _cache[key] = (now + current_app.config["FRIENDSHIP_CACHE_TTL"], result)
+        _cache.move_to_end(key)
+
+        while len(_cache) > current_app.config["FRIENDSHIP_CACHE_SIZE"]:
+            _cache.popitem(last=False)
+
+    return result
+
+
+def invalidate_friendship(user_id, other_user_id):
+    """Called after two users become friends or stop being friends"""
+    with _cache_lock:
+        _cache.pop(friendship_key(user_id, other_user_id), None)
@@ -0,0 +1,128 @@
+from sqlalchemy import delete, insert, select
+
+from app import db
+from app.helpers import extract_hashtags
+from app.models import Hashtag, Post, post_hashtag_table
+from app.services.feed import paginate_keyset, post_loader_options
+from app.services.trending import count_hashtags
+
+
+def get_or_create_hashtags(names):
+    """Return Hashtag rows for the given names, creating the missing ones"""
+    if not names:
+        return []
+
+    hashtags = Hashtag.query.filter(Hashtag.name.in_(names)).all()
+    missing = set(names) - {hashtag.name for hashtag in hashtags}
+
+    for name in missing:
+        hashtag = Hashtag(name=name)
+        db.session.add(hashtag)
+        hashtags.append(hashtag)
+
+    if missing:
+        db.session.flush()
+
+    return hashtags
+
+
+def index_post_hashtags(post):
+    """Link a new post to the hashtags in its content, returns the Hashtag rows"""
+    hashtags = get_or_create_hashtags(extract_hashtags(post.content))
+
+    if hashtags:
+        # created_at is selected from the post row so it is stored in the same
+        # format as the original and compares equal in keyset cursors
+        rows = (
+            select(Hashtag.id, Post.id, Post.created_at)
+            .join(Post, Post.id == post.id)
+            .where(Hashtag.id.in_([hashtag.id for hashtag in hashtags]))
+        )
+
+        db.session.execute(
+            insert(post_hashtag_table).from_select(
+                ["hashtag_id", "post_id", "created_at"], rows
+            )
+        )
+
+        count_hashtags(hashtags)
+
+    return hashtags
+
+
+def remove_post_hashtags(post_id):
+    db.session.execute(
+        delete(post_hashtag_table).where(post_hashtag_table.c.post_id == post_id)
+    )
+
+
+def reindex_hashtags(batch_size=1000):
+    """Rebuild post_hashtag from every post's content, returns the number of links"""
+    db.session.execute(delete(post_hashtag_table))
+
+    hashtag_ids = dict(db.session.execute(select(Hashtag.name, Hashtag.id)).all())
+
+    count = 0
+    last_id = 0
+    while True:
+        # Walk the posts by primary key so memory stays bounded
+        posts = db.session.execute(
+            select(Post.id, Post.content)
+            .where(Post.id > last_id)
+            .order_by(Post.id)
+            .limit(batch_size)
+        ).all()
+
+        if not posts:
+            break
+
+        links = []
+        for post in posts:
+            for name in extract_hashtags(post.content):
+                if name not in hashtag_ids:
+                    hashtag = Hashtag(name=name)
+                    db.session.add(hashtag)
+                    db.session.flush()
+                    hashtag_ids[name] = hashtag.id
+
+                links.append((hashtag_ids[name], post.id))
+
+        if links:
+            rows = (
+                select(Hashtag.id, Post.id, Post.created_at)
+                .join(Post, db.tuple_(Hashtag.id, Post.id).in_(links))
+                .where(Post.id.in_([post.id for post in posts]))
+            )
+            db.session.execute(
+                insert(post_hashtag_table).from_select(
+                    ["hashtag_id", "post_id", "created_at"], rows
+                )
+            )
+            count += len(links)
+
+        last_id = posts[-1].id
+
+    return count
+
+
+# Posts with a hashtag, newest first
+def get_tag_page(tag, cursor=None, limit=None):
+    hashtag = Hashtag.query.filter_by(name=tag.lower()).first()
+
+    if not hashtag:
+        return [], None
+
+    query = (
+        Post.query.options(*post_loader_options())
+        .join(post_hashtag_table, post_hashtag_table.c.post_id == Post.id)
+        .filter(post_hashtag_table.c.hashtag_id == hashtag.id)
+    )
+
+    return paginate_keyset(
+        query,
+        post_hashtag_table.c.created_at,
+        post_hashtag_table.c.post_id,
+        cursor,
+        limit,
+        key=lambda post: (post.created_at, post.id),
+    )
@@ -0,0 +1,165 @@
+import atexit
+import queue
+import threading
+import uuid
+from collections import Counter
+
+from sqlalchemy import insert, select
+
+from app import db, socketio
+from app.models import Message, User
+from app.services.conversations import record_messages
+from app.services.counters import increment_counter
+
+# Messages acknowledged to the clients but not written yet, see MESSAGE_WRITE_BEHIND
+_queue = queue.Queue()
+# Rows of a failed flush, written before anything queued after them
+_retry = []
+_flush_lock = threading.Lock()
+# (sender_id, client_id) of the queued and retried rows, to drop a resend
+_pending_keys = set()
+_pending_lock = threading.Lock()
+
+
+def new_client_id():
+    return uuid.uuid4().hex
+
+
+def enqueue_message(sender_id, recipient_id, content, client_id):
+    """
+    Queue a message for the background writer, it has no id until flushed.
+    Returns False without queueing if the same message is already pending.
+    """
+    with _pending_lock:
+        if (sender_id, client_id) in _pending_keys:
+            return False
+        _pending_keys.add((sender_id, client_id))
+
+    _queue.put(
+        {
+            "sender_id": sender_id,
+            "recipient_id": recipient_id,
+            "content": content,
+            "client_id": client_id,
+        }
+    )
+    return True
+
+
+def get_stored_message_id(sender_id, client_id):
+    """Id of the message a sender already stored under client_id, or None"""
+    return db.session.execute(
+        select(Message.id).where(
+            Message.sender_id == sender_id, Message.client_id == client_id
+        )
+    ).scalar()
+
+
+def write_messages(rows):
+    """
+    Insert a batch of message rows with one executemany, then update their
+    conversations and unread counters. Rows whose (sender_id, client_id) is
+    already stored are skipped, so a resent message is written once.
+    Returns the number of inserted messages.
+    """
+    client_ids = [row["client_id"] for row in rows]
+    existing = set(
+        db.session.execute(
+            select(Message.sender_id, Message.client_id).where(
+                Message.client_id.in_(client_ids)
+            )
+        ).all()
+    )
+
+    new_rows = {}
+    for row in rows:
+        key = (row["sender_id"], row["client_id"])
+        if key not in existing and key not in new_rows:
+            new_rows[key] = row
+
+    if not new_rows:
+        return 0
+
+    db.session.execute(insert(Message), list(new_rows.values()))
+
+    messages = [
+        message
+        for message in db.session.execute(
+            select(Message.id, Message.sender_id, Message.recipient_id, Message.client_id)
+            .where(Message.client_id.in_(client_ids))
+            .order_by(Message.id)
+        )
+        if (message.sender_id, message.client_id) in new_rows
+    ]
+    record_messages(messages)
+
+    for recipient_id, count in Counter(m.recipient_id for m in messages).items():
+        increment_counter(User.unread_messages, recipient_id, count)
+
+    return len(messages)
+
+
+def flush_messages(limit=None):
+    """
+    Write up to limit queued messages in one transaction, returns how many
+    were taken from the queue. Needs an app context. A failed batch is kept
+    and retried first on the next flush, the error is re-raised.
+    """
+    with _flush_lock:
+        rows = _retry[:limit] if limit else _retry[:]
+        del _retry[: len(rows)]
+
+        while limit is None or len(rows) < limit:
+            try:
+                rows.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        if not rows:
+            return 0
+
+        try:
+            write_messages(rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            _retry[:0] = rows
+            raise
+
+    with _pending_lock:
+        _pending_keys.difference_update(
+            (row["sender_id"], row["client_id"]) for row in rows
+        )
+
+    return len(rows)
+
+
+def _run_writer(app):
+    interval = app.config["MESSAGE_FLUSH_INTERVAL_MS"] / 1000
+    batch_size = app.config["MESSAGE_FLUSH_BATCH_SIZE"]
+
+    while True:
+        socketio.sleep(interval)
+
+        with app.app_context():
+            try:
+                # Drain a backlog in full batches before sleeping again
+                while flush_messages(batch_size) == batch_size:
+                    pass
+            except Exception:
+                app.logger.exception("Writing queued messages failed")
+
+
+def _flush_on_exit(app):
+    with app.app_context():
+        flush_messages()
+
+
+def init_message_writer(app):
+    """Start the background writer when MESSAGE_WRITE_BEHIND is on"""
+    if not app.config["MESSAGE_WRITE_BEHIND"]:
+        return
+
+    socketio.start_background_task(_run_writer, app)
+    # A clean shutdown writes what is left, a crash loses it
+    atexit.register(_flush_on_exit, app)
@@ -1,7 +1,7 @@
 from app import db
-from app.events import connected_users
-from app.models import Notification
-from app.services import socketio
+from app.models import Notification, User
+from app.services.counters import decrement_counter, increment_counter
+from app.services.realtime import emit_to_user
 
 
 def create_notification(
@@ -16,14 +16,14 @@ def create_notification(
     )
 
     db.session.add(notification)
+    increment_counter(User.unread_notifications, recipient_id)
 
     return notification
 
 
 def emit_notification(notification):
     """Emit notification to specific user"""
-    recipient_sid = connected_users.get(notification.recipient_id)
-    socketio.emit("notification", notification.to_dict(), to=recipient_sid)
+    emit_to_user(notification.recipient_id, "notification", notification.to_dict())
 
 
 def get_unread_notifications(user_id):
@@ -69,13 +69,36 @@ def get_next_notification(user_id, notificationIds):
 
 
 def mark_as_read(notification_id, user_id):
-    """Mark notification as read"""
-    notification = Notification.query.filter(
-        Notification.id == notification_id, Notification.recipient_id == user_id
-    ).first()
-
-    if notification:
-        notification.is_read = True
-        db.session.commit()
+    """
+    Mark a notification as read, returns False if the user has no such
+    notification. The UPDATE only matches an unread row, so two concurrent
+    requests decrement the counter once.
+    """
+    result = Notification.query.filter_by(
+        id=notification_id, recipient_id=user_id, is_read=False
+    ).update({Notification.is_read: True})
+
+    if not result:
+        # Already read, or not a notification of this user
+        return db.session.query(
+            Notification.query.filter_by(
+                id=notification_id, recipient_id=user_id
+            ).exists()
+        ).scalar()
+
+    decrement_counter(User.unread_notifications, user_id, result)
+    db.session.commit()
+
+    return True
+
+
+def mark_all_as_read(user_id):
+    """Mark every unread notification of a user as read with one UPDATE"""
+    result = Notification.query.filter_by(recipient_id=user_id, is_read=False).update(
+        {Notification.is_read: True}
+    )
+    decrement_counter(User.unread_notifications, user_id, result)
+    db.session.commit()
 
-    return notification
+    # Other tabs of the user drop their badge and dropdown items
+    emit_to_user(user_id, "notifications_read", {})
@@ -0,0 +1,73 @@
+from flask import current_app
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import selectinload
+
+from app import db
+from app.models import User, UserClass, UserInterest, UserLink
+
+# Profile lists that can be browsed by name, see get_members_page
+MEMBER_LISTS = {"classes": UserClass, "interests": UserInterest}
+
+
+def clean_values(values, max_length):
+    """Stripped, non-empty, distinct values in the order they were entered"""
+    cleaned = []
+    for value in values:
+        value = value.strip()[:max_length]
+        if value and value not in cleaned:
+            cleaned.append(value)
+    return cleaned
+
+
+def replace_user_rows(model, user, rows):
+    """Swap the rows of model belonging to user for rows, in two statements"""
+    db.session.execute(delete(model).where(model.user_id == user.id))
+    if rows:
+        db.session.execute(insert(model), [{"user_id": user.id, **row} for row in rows])
+
+
+def set_user_interests(user, names):
+    names = clean_values(names, UserInterest.name.type.length)
+    replace_user_rows(UserInterest, user, [{"name": name} for name in names])
+    db.session.expire(user, ["interests"])
+
+
+def set_user_classes(user, names):
+    names = clean_values(names, UserClass.name.type.length)
+    replace_user_rows(UserClass, user, [{"name": name} for name in names])
+    db.session.expire(user, ["classes"])
+
+
+def set_user_links(user, urls):
+    urls = clean_values(urls, UserLink.url.type.length)
+    replace_user_rows(UserLink, user, [{"url": url} for url in urls])
+    db.session.expire(user, ["links"])
+
+
+def profile_list_options():
+    """Loader options for pages showing the classes and interests of many users"""
+    return [selectinload(User.classes), selectinload(User.interests)]
+
+
+def get_members_page(model, name, after=None, limit=None):
+    """
+    Users who listed name in model (UserClass or UserInterest), by user id,
+    a range scan on the (name, user_id) index. after is the last user id of
+    the previous page. Returns (users, next_after).
+    """
+    limit = limit or current_app.config["DIRECTORY_PAGE_SIZE"]
+
+    query = (
+        User.query.options(*profile_list_options())
+        .join(model, model.user_id == User.id)
+        .filter(model.name == name)
+        .order_by(model.user_id)
+    )
+    if after:
+        query = query.filter(model.user_id > after)
+
+    # Fetch one extra row to know if there's a next page
+    users = query.limit(limit + 1).all()
+    next_after = users[limit - 1].id if len(users) > limit else None
+
+    return users[:limit], next_after
@@ -0,0 +1,19 @@
+from app.services import socketio
+
+
+def user_room(user_id):
+    """Room every socket of a user joins on connect"""
+    return f"user:{user_id}"
+
+
+def emit_to_user(user_id, event, data):
+    """
+    Emit to every socket of a user. Goes through the message queue when one
+    is configured, so it reaches sockets connected to other workers.
+    """
+    socketio.emit(event, data, to=user_room(user_id))
+
+
+def emit_to_users(user_ids, event, data):
+    """Emit once to the rooms of several users, a socket in two of them gets it once"""
+    socketio.emit(event, data, to=[user_room(user_id) for user_id in user_ids])
@@ -0,0 +1,276 @@
+import heapq
+from itertools import groupby
+
+from flask import current_app
+from sqlalchemy import and_, delete, exists, func, insert, or_, select, tuple_, union_all
+from sqlalchemy.orm import aliased, joinedload
+
+from app import db
+from app.models import Friendship, FriendshipStatusEnum, FriendSuggestion, User, UserClass, UserInterest
+
+# Users whose suggestions are computed together by rebuild_suggestions
+REBUILD_CHUNK_SIZE = 200
+
+
+def mutual_friend_counts(user_ids, candidate_ids=None):
+    """
+    (user_id, candidate_id, mutual_friends) for every friend of a friend of
+    user_ids who has no friendship or pending request with them, ordered by
+    user_id. Both hops are index lookups on the friendship table.
+    """
+    accepted = Friendship.status == FriendshipStatusEnum.ACCEPTED
+    first_hop = union_all(
+        select(
+            Friendship.user_a_id.label("user_id"), Friendship.user_b_id.label("friend_id")
+        ).where(accepted, Friendship.user_a_id.in_(user_ids)),
+        select(Friendship.user_b_id, Friendship.user_a_id).where(
+            accepted, Friendship.user_b_id.in_(user_ids)
+        ),
+    ).cte("first_hop")
+
+    edge = aliased(Friendship, name="edge")
+    edge_accepted = edge.status == FriendshipStatusEnum.ACCEPTED
+    paths = union_all(
+        select(first_hop.c.user_id, edge.user_b_id.label("candidate_id"))
+        .join(edge, edge.user_a_id == first_hop.c.friend_id)
+        .where(edge_accepted),
+        select(first_hop.c.user_id, edge.user_a_id)
+        .join(edge, edge.user_b_id == first_hop.c.friend_id)
+        .where(edge_accepted),
+    ).subquery("paths")
+
+    related = exists().where(
+        or_(
+            and_(
+                Friendship.user_a_id == paths.c.user_id,
+                Friendship.user_b_id == paths.c.candidate_id,
+            ),
+            and_(
+                Friendship.user_a_id == paths.c.candidate_id,
+                Friendship.user_b_id == paths.c.user_id,
+            ),
+        )
+    )
+
+    query = (
+        select(paths.c.user_id, paths.c.candidate_id, func.count().label("mutual_friends"))
+        .where(paths.c.candidate_id != paths.c.user_id, ~related)
+        .group_by(paths.c.user_id, paths.c.candidate_id)
+        .order_by(paths.c.user_id)
+    )
+
+    if candidate_ids is not None:
+        query = query.where(paths.c.candidate_id.in_(candidate_ids))
+
+    return db.session.execute(query).all()
+
+
+def profile_tags(user_ids):
+    """Lowercased classes and interests of each user, to count what two users share"""
+    rows = db.session.execute(
+        union_all(
+            select(UserClass.user_id, UserClass.name).where(
+                UserClass.user_id.in_(user_ids)
+            ),
+            select(UserInterest.user_id, UserInterest.name).where(
+                UserInterest.user_id.in_(user_ids)
+            ),
+        )
+    )
+
+    tags = {}
+    for user_id, name in rows:
+        tags.setdefault(user_id, set()).add(name.lower())
+
+    return tags
+
+
+def rank_candidates(counts):
+    """Score the rows of mutual_friend_counts and keep the best per user"""
+    if not counts:
+        return []
+
+    limit = current_app.config["SUGGESTIONS_PER_USER"]
+    weight = current_app.config["SUGGESTION_MUTUAL_WEIGHT"]
+
+    tags = profile_tags(
+        {row.user_id for row in counts} | {row.candidate_id for row in counts}
+    )
+
+    suggestions = []
+    for user_id, rows in groupby(counts, key=lambda row: row.user_id):
+        user_tags = tags.get(user_id, set())
+        scored = []
+
+        for row in rows:
+            shared_tags = len(user_tags & tags.get(row.candidate_id, set()))
+            scored.append(
+                {
+                    "user_id": user_id,
+                    "candidate_id": row.candidate_id,
+                    "mutual_friends": row.mutual_friends,
+                    "shared_tags": shared_tags,
+                    "score": row.mutual_friends * weight + shared_tags,
+                }
+            )
+
+        suggestions.extend(
+            heapq.nlargest(
+                limit, scored, key=lambda s: (s["score"], -s["candidate_id"])
+            )
+        )
+
+    return suggestions
+
+
+def store_suggestions(suggestions):
+    if suggestions:
+        db.session.execute(insert(FriendSuggestion), suggestions)
+    return len(suggestions)
+
+
+def rebuild_suggestions():
+    """Recompute every user's suggestions, returns the row count"""
+    db.session.execute(delete(FriendSuggestion))
+    user_ids = db.session.execute(select(User.id).order_by(User.id)).scalars().all()
+
+    count = 0
+    for start in range(0, len(user_ids), REBUILD_CHUNK_SIZE):
+        chunk = user_ids[start : start + REBUILD_CHUNK_SIZE]
+        count += store_suggestions(rank_candidates(mutual_friend_counts(chunk)))
+
+    return count
+
+
+def trim_suggestions(user_ids):
+    """Drop the candidates ranked below SUGGESTIONS_PER_USER"""
+    ranked = (
+        select(
+            FriendSuggestion.user_id,
+            FriendSuggestion.candidate_id,
+            func.row_number()
+            .over(
+                partition_by=FriendSuggestion.user_id,
+                order_by=(
+                    FriendSuggestion.score.desc(),
+                    FriendSuggestion.candidate_id,
+                ),
+            )
+            .label("position"),
+        )
+        .where(FriendSuggestion.user_id.in_(user_ids))
+        .subquery()
+    )
+
+    db.session.execute(
+        delete(FriendSuggestion).where(
+            tuple_(FriendSuggestion.user_id, FriendSuggestion.candidate_id).in_(
+                select(ranked.c.user_id, ranked.c.candidate_id).where(
+                    ranked.c.position > current_app.config["SUGGESTIONS_PER_USER"]
+                )
+            )
+        )
+    )
+
+
+def friends_of(user_ids):
+    """{user_id: [friend ids]} for user_ids, in one SELECT"""
+    accepted = Friendship.status == FriendshipStatusEnum.ACCEPTED
+    rows = db.session.execute(
+        union_all(
+            select(Friendship.user_a_id, Friendship.user_b_id).where(
+                accepted, Friendship.user_a_id.in_(user_ids)
+            ),
+            select(Friendship.user_b_id, Friendship.user_a_id).where(
+                accepted, Friendship.user_b_id.in_(user_ids)
+            ),
+        )
+    )
+
+    friends = {user_id: [] for user_id in user_ids}
+    for user_id, friend_id in rows:
+        friends[user_id].append(friend_id)
+    return friends
+
+
+def update_suggestions_for_friendship(user_id, other_user_id):
+    """
+    Called when two users became friends or stopped being friends. Their own
+    lists are recomputed, and each of them is rescored as a candidate for the
+    friends of the other, whose mutual friend count just changed. Both are
+    done in one pass: one delete, one insert and one trim whatever the number
+    of friends. A candidate that drops out of a list is only replaced by the
+    next rebuild_suggestions.
+    """
+    user_ids = [user_id, other_user_id]
+    friends = friends_of(user_ids)
+    pairs = {
+        (friend, other)
+        for user, other in ((user_id, other_user_id), (other_user_id, user_id))
+        for friend in friends[user]
+        if friend != other
+    }
+    friend_ids = {friend for friend, other in pairs}
+
+    stale = FriendSuggestion.user_id.in_(user_ids)
+    if pairs:
+        stale = or_(
+            stale,
+            tuple_(FriendSuggestion.user_id, FriendSuggestion.candidate_id).in_(pairs),
+        )
+    db.session.execute(delete(FriendSuggestion).where(stale))
+
+    counts = list(mutual_friend_counts(user_ids))
+    if pairs:
+        counts += [
+            row
+            for row in mutual_friend_counts(friend_ids, user_ids)
+            if (row.user_id, row.candidate_id) in pairs
+        ]
+    # rank_candidates groups the rows by user
+    counts.sort(key=lambda row: row.user_id)
+
+    store_suggestions(rank_candidates(counts))
+    if pairs:
+        trim_suggestions(friend_ids)
+
+
+def remove_suggestion_pair(user_id, other_user_id):
+    """A pending request takes the pair out of each other's suggestions"""
+    db.session.execute(
+        delete(FriendSuggestion).where(
+            or_(
+                and_(
+                    FriendSuggestion.user_id == user_id,
+                    FriendSuggestion.candidate_id == other_user_id,
+                ),
+                and_(
+                    FriendSuggestion.user_id == other_user_id,
+                    FriendSuggestion.candidate_id == user_id,
+                ),
+            )
+        )
+    )
+
+
+def delete_user_suggestions(user_id):
+    """Suggestions of and for a deleted user"""
+    db.session.execute(
+        delete(FriendSuggestion).where(
+            or_(
+                FriendSuggestion.user_id == user_id,
+                FriendSuggestion.candidate_id == user_id,
+            )
+        )
+    )
+
+
+# People you may know, best first
+def get_suggestions(user_id, limit=5):
+    return (
+        FriendSuggestion.query.options(joinedload(FriendSuggestion.candidate))
+        .filter(FriendSuggestion.user_id == user_id)
+        .order_by(FriendSuggestion.score.desc(), FriendSuggestion.candidate_id)
+        .limit(limit)
+        .all()
+    )
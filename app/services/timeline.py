@@ -0,0 +1,115 @@
+from flask import current_app
+from sqlalchemy import delete, exists, insert, literal, select, union_all
+
+from app import db
+from app.models import Friendship, FriendshipStatusEnum, Post, TimelineEntry
+from app.services.feed import paginate_keyset, post_loader_options
+from app.services.friendships import friend_ids_select
+
+
+def fan_out_post(post):
+    """Copy a new post into the timeline of every friend of its author"""
+    # created_at is selected from the post row rather than bound from Python,
+    # so the copy is stored in exactly the same format as the original
+    friend_ids = friend_ids_select(post.user_id).subquery()
+    friends = select(
+        friend_ids.c.friend_id, Post.id, Post.user_id, Post.created_at
+    ).join(Post, Post.id == post.id)
+
+    db.session.execute(
+        insert(TimelineEntry).from_select(
+            ["user_id", "post_id", "author_id", "created_at"], friends
+        )
+    )
+
+
+def backfill_timeline(user_id, author_id, limit=None):
+    """Copy the latest posts of author into user's timeline, skipping existing rows"""
+    limit = limit or current_app.config["TIMELINE_BACKFILL_LIMIT"]
+
+    posts = (
+        select(literal(user_id), Post.id, Post.user_id, Post.created_at)
+        .where(
+            Post.user_id == author_id,
+            ~exists().where(
+                TimelineEntry.user_id == user_id, TimelineEntry.post_id == Post.id
+            ),
+        )
+        .order_by(Post.created_at.desc())
+        .limit(limit)
+    )
+
+    db.session.execute(
+        insert(TimelineEntry).from_select(
+            ["user_id", "post_id", "author_id", "created_at"], posts
+        )
+    )
+
+
+def add_friendship_to_timelines(user_id, friend_id):
+    backfill_timeline(user_id, friend_id)
+    backfill_timeline(friend_id, user_id)
+
+
+def remove_friendship_from_timelines(user_id, friend_id):
+    """Drop the posts of two former friends from each other's timelines"""
+    db.session.execute(
+        delete(TimelineEntry).where(
+            db.or_(
+                db.and_(
+                    TimelineEntry.user_id == user_id,
+                    TimelineEntry.author_id == friend_id,
+                ),
+                db.and_(
+                    TimelineEntry.user_id == friend_id,
+                    TimelineEntry.author_id == user_id,
+                ),
+            )
+        )
+    )
+
+
+def remove_post_from_timelines(post_id):
+    db.session.execute(delete(TimelineEntry).where(TimelineEntry.post_id == post_id))
+
+
+def rebuild_timelines():
+    """Rebuild every timeline from the current friendships, returns the row count"""
+    db.session.execute(delete(TimelineEntry))
+
+    # Each friendship row feeds both directions
+    accepted = Friendship.status == FriendshipStatusEnum.ACCEPTED
+    posts = union_all(
+        select(Friendship.user_a_id, Post.id, Post.user_id, Post.created_at)
+        .join(Post, Post.user_id == Friendship.user_b_id)
+        .where(accepted),
+        select(Friendship.user_b_id, Post.id, Post.user_id, Post.created_at)
+        .join(Post, Post.user_id == Friendship.user_a_id)
+        .where(accepted),
+    )
+
+    result = db.session.execute(
+        insert(TimelineEntry).from_select(
+            ["user_id", "post_id", "author_id", "created_at"], posts
+        )
+    )
+
+    return result.rowcount
+
+
+# Friends feed, newest first
+def get_timeline_page(user_id, cursor=None, limit=None):
+    query = (
+        Post.query.options(*post_loader_options())
+        .join(TimelineEntry, TimelineEntry.post_id == Post.id)
+        .filter(TimelineEntry.user_id == user_id)
+    )
+
+    return paginate_keyset(
+        query,
+        TimelineEntry.created_at,
+        TimelineEntry.post_id,
+        cursor,
+        limit,
+        key=lambda post: (post.created_at, post.id),
+    )
@@ -0,0 +1,95 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select, update
+
+from app import db
+from app.models import Hashtag, HashtagCount
+
+WINDOWS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(days=7),
+}
+
+# (window, limit) -> (expires_at, tags), shared by every request of the process
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def current_bucket(now=None):
+    """Start of the counting bucket now falls in"""
+    now = now or datetime.utcnow()
+    minutes = current_app.config["TRENDING_BUCKET_MINUTES"]
+    minute = now.minute - now.minute % minutes
+    return now.replace(minute=minute, second=0, microsecond=0)
+
+
+def count_hashtags(hashtags):
+    """Add one use of every hashtag to the current bucket"""
+    bucket = current_bucket()
+
+    for hashtag in hashtags:
+        result = db.session.execute(
+            update(HashtagCount)
+            .where(
+                HashtagCount.hashtag_id == hashtag.id,
+                HashtagCount.bucket_start == bucket,
+            )
+            .values(count=HashtagCount.count + 1)
+        )
+
+        if result.rowcount == 0:
+            db.session.execute(
+                insert(HashtagCount).values(
+                    hashtag_id=hashtag.id, bucket_start=bucket, count=1
+                )
+            )
+
+
+def query_trending(window, limit):
+    since = current_bucket(datetime.utcnow() - WINDOWS[window])
+    total = func.sum(HashtagCount.count).label("count")
+
+    rows = db.session.execute(
+        select(Hashtag.name, total)
+        .join(Hashtag, Hashtag.id == HashtagCount.hashtag_id)
+        .where(HashtagCount.bucket_start >= since)
+        .group_by(Hashtag.id, Hashtag.name)
+        .order_by(total.desc(), Hashtag.name)
+        .limit(limit)
+    ).all()
+
+    return [{"name": row.name, "count": row.count} for row in rows]
+
+
+def get_trending(window="day", limit=10):
+    """Top hashtags over a window, cached in memory for TRENDING_CACHE_TTL seconds"""
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown window: {window}")
+
+    key = (window, limit)
+    now = time.monotonic()
+
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    tags = query_trending(window, limit)
+
+    with _cache_lock:
+        _cache[key] = (now + current_app.config["TRENDING_CACHE_TTL"], tags)
+
+    return tags
+
+
+def prune_hashtag_counts():
+    """Delete buckets older than the longest window, returns the number of rows"""
+    since = current_bucket(datetime.utcnow() - max(WINDOWS.values()))
+    result = db.session.execute(
+        delete(HashtagCount).where(HashtagCount.bucket_start < since)
+    )
+    return result.rowcount
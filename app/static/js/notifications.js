@@ -30,7 +30,11 @@ socket.on("no_unread_messages", function () {
 socket.on("new_unread_message", function () {
 	const unreadBadge = document.getElementById("unread-badge");
 
-	if (unreadBadge) return;
+	// Hidden by another tab reading the messages, show it again
+	if (unreadBadge) {
+		unreadBadge.style.display = "";
+		return;
+	}
 
 	const unreadBadgeWrapper = document.getElementById(
 		"unread-badge-wrapper"
@@ -53,9 +57,18 @@ socket.on("new_unread_message", function () {
 								>
 							</span>
 							`;
+	newBadge.id = "unread-badge";
 	unreadBadgeWrapper.appendChild(newBadge);
 });
 
+// All notifications were marked as read in another tab
+socket.on("notifications_read", function () {
+	displayedNotifications = [];
+	hideNotificationBadge();
+	notificationsDisplayBase();
+	updateReadStatus();
+});
+
 // New notifications
 socket.on("notification", function (notification) {
 	// Check if the notification has already been displayed
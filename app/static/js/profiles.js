@@ -0,0 +1,132 @@
+// Bind friend request buttons of every user card under root
+function bindProfileEvents(root) {
+	root.querySelectorAll(".add-btn").forEach((addBtn) => {
+		const username = addBtn
+			.closest(".list-group-item")
+			.getAttribute("data-user-username");
+
+		addBtn.addEventListener("click", (e) => {
+			e.preventDefault();
+
+			fetch(`/requests/${username}`, {
+				method: "POST",
+			})
+				.then((response) => {
+					console.log(response);
+					if (response.ok) {
+						location.reload();
+					}
+				})
+				.catch((error) => {
+					console.error("Error:", error);
+				});
+		});
+	});
+
+	root.querySelectorAll(".accept-btn").forEach((acceptBtn) => {
+		const username = acceptBtn
+			.closest(".list-group-item")
+			.getAttribute("data-user-username");
+
+		acceptBtn.addEventListener("click", (e) => {
+			e.preventDefault();
+
+			fetch(`/requests/${username}/accept`, {
+				method: "POST",
+			})
+				.then((response) => {
+					if (response.ok) {
+						location.reload();
+					}
+				})
+				.catch((error) => {
+					console.error("Error:", error);
+				});
+		});
+	});
+
+	root.querySelectorAll(".decline-btn").forEach((declineBtn) => {
+		const username = declineBtn
+			.closest(".list-group-item")
+			.getAttribute("data-user-username");
+
+		declineBtn.addEventListener("click", (e) => {
+			e.preventDefault();
+
+			fetch(`/requests/${username}/decline`, {
+				method: "POST",
+			})
+				.then((response) => {
+					if (response.ok) {
+						location.reload();
+					}
+				})
+				.catch((error) => {
+					console.error("Error:", error);
+				});
+		});
+	});
+
+	root.querySelectorAll(".remove-btn").forEach((removeBtn) => {
+		const username = removeBtn
+			.closest(".modal")
+			.getAttribute("data-user-username");
+
+		removeBtn.addEventListener("click", (e) => {
+			e.preventDefault();
+
+			fetch(`/friends/${username}/remove`, {
+				method: "DELETE",
+			})
+				.then((response) => {
+					if (response.ok) {
+						location.reload();
+					}
+				})
+				.catch((error) => {
+					console.error("Error:", error);
+				});
+		});
+	});
+}
+
+bindProfileEvents(document);
+
+// Next page of users when the sentinel comes into view
+const profilesSentinel = document.getElementById("profiles-sentinel");
+
+if (profilesSentinel) {
+	let isLoading = false;
+
+	const observer = new IntersectionObserver((entries) => {
+		if (!entries[0].isIntersecting || isLoading) return;
+
+		isLoading = true;
+		const url = new URL(profilesSentinel.getAttribute("data-url"), location.origin);
+		url.searchParams.set("after", profilesSentinel.getAttribute("data-after"));
+
+		fetch(url)
+			.then((response) => response.json())
+			.then((data) => {
+				const page = document.createElement("div");
+				page.innerHTML = data.html;
+				bindProfileEvents(page);
+				document.getElementById("profiles").append(...page.children);
+
+				if (data.next_after) {
+					profilesSentinel.setAttribute("data-after", data.next_after);
+				} else {
+					observer.disconnect();
+					profilesSentinel.remove();
+				}
+			})
+			.catch((error) => {
+				console.error("Error:", error);
+			})
+			.finally(() => {
+				isLoading = false;
+			});
+	});
+
+	observer.observe(profilesSentinel);
+}
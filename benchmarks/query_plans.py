@@ -0,0 +1,232 @@
+"""
+Compare the query plans and timings of the message, notification, like and
+user directory lookups with and without their indexes, on a seeded SQLite
+database.
+
+    python benchmarks/query_plans.py --messages 2000000 --notifications 1000000
+
+The queries are captured from the real service functions, so the benchmark
+follows the code. Seeding is done in SQL with recursive CTEs, foreign keys are
+not enforced by SQLite so users get random names and no posts are created.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import event, text
+
+from app import create_app, db
+from app.config import Config
+from app.models import Conversation, Like, Message, Notification, User
+
+INDEXED_TABLES = [
+    Message.__table__,
+    Conversation.__table__,
+    Notification.__table__,
+    Like.__table__,
+    User.__table__,
+]
+
+SEED_USERS = """
+WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :count),
+letters(n, word) AS (
+    SELECT n, upper(char(97 + abs(random()) % 26)) || char(97 + abs(random()) % 26,
+           97 + abs(random()) % 26, 97 + abs(random()) % 26, 97 + abs(random()) % 26)
+    FROM seq
+)
+INSERT INTO user (username, email, password, name, surname, is_completed, is_public)
+SELECT 'user' || n, 'user' || n || '@example.com', 'x', word,
+       substr(word, 3) || substr(word, 1, 2), 1, 1
+FROM letters
+"""
+
+SEED_MESSAGES = """
+WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :count)
+INSERT INTO message (sender_id, recipient_id, content, created_at, is_read)
+SELECT abs(random()) % :users + 1, abs(random()) % :users + 1, 'Hello',
+       datetime('now', '-' || (abs(random()) % 31536000) || ' seconds'),
+       abs(random()) % 20 != 0
+FROM seq
+"""
+
+SEED_NOTIFICATIONS = """
+WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :count)
+INSERT INTO notification (recipient_id, sender_id, notification_type, post_id, is_read, created_at)
+SELECT abs(random()) % :users + 1, abs(random()) % :users + 1, 'post_like',
+       abs(random()) % :posts + 1, abs(random()) % 10 != 0,
+       datetime('now', '-' || (abs(random()) % 31536000) || ' seconds')
+FROM seq
+"""
+
+SEED_LIKES = """
+WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :count)
+INSERT INTO "like" (user_id, post_id, created_at)
+SELECT abs(random()) % :users + 1, abs(random()) % :posts + 1,
+       datetime('now', '-' || (abs(random()) % 31536000) || ' seconds')
+FROM seq
+"""
+
+
+def cases():
+    from app.services.conversations import get_conversations, get_message_page
+    from app.services.directory import autocomplete_users, get_directory_page
+    from app.services.notifications import get_notifications, get_unread_notifications
+
+    user_id, other_id = 1, 2
+
+    def unread_from_friend():
+        # Same query as mark_messages_as_read
+        return Message.query.filter(
+            Message.sender_id == other_id,
+            Message.recipient_id == user_id,
+            Message.is_read == False,
+        ).all()
+
+    def like_toggle():
+        return Like.query.filter_by(user_id=user_id, post_id=1).first()
+
+    return {
+        "conversation page": lambda: get_message_page(user_id, other_id),
+        "inbox": lambda: get_conversations(user_id),
+        "unread from friend": unread_from_friend,
+        "unread notifications": lambda: get_unread_notifications(user_id),
+        "all notifications": lambda: get_notifications(user_id),
+        "like toggle": like_toggle,
+        "directory search": lambda: get_directory_page("ab"),
+        "autocomplete": lambda: autocomplete_users("ab"),
+    }
+
+
+def capture_statements(fn):
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    return statements
+
+
+def query_plan(statements):
+    connection = db.session.connection()
+    details = []
+
+    for statement, parameters in statements:
+        rows = connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + statement, parameters
+        ).all()
+        details.extend(row[-1] for row in rows)
+
+    return "; ".join(details)
+
+
+def best_time(fn, repeat):
+    timings = []
+
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings) * 1000
+
+
+def run_cases(repeat):
+    results = {}
+
+    for name, fn in cases().items():
+        results[name] = (best_time(fn, repeat), query_plan(capture_statements(fn)))
+
+    return results
+
+
+def seed(args):
+    from app.services.conversations import rebuild_conversations
+
+    connection = db.session.connection()
+    connection.exec_driver_sql("PRAGMA journal_mode = OFF")
+    connection.exec_driver_sql("PRAGMA synchronous = OFF")
+
+    params = {"users": args.users, "posts": args.posts}
+
+    for label, sql, count in [
+        ("users", SEED_USERS, args.users),
+        ("messages", SEED_MESSAGES, args.messages),
+        ("notifications", SEED_NOTIFICATIONS, args.notifications),
+        ("likes", SEED_LIKES, args.likes),
+    ]:
+        start = time.perf_counter()
+        db.session.execute(text(sql), {**params, "count": count})
+        print(f"Seeded {count} {label} in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    count = rebuild_conversations()
+    print(f"Built {count} conversations in {time.perf_counter() - start:.1f}s")
+
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", help="SQLite file, removed when done")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--posts", type=int, default=200000)
+    parser.add_argument("--messages", type=int, default=2000000)
+    parser.add_argument("--notifications", type=int, default=1000000)
+    parser.add_argument("--likes", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = args.database or os.path.join(tempfile.gettempdir(), "network50-bench.db")
+    if os.path.exists(path):
+        os.remove(path)
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.abspath(path)}"
+
+    app = create_app(BenchmarkConfig)
+
+    try:
+        with app.app_context():
+            db.create_all()
+
+            indexes = [index for table in INDEXED_TABLES for index in table.indexes]
+            for index in indexes:
+                index.drop(db.engine)
+
+            seed(args)
+            db.session.execute(text("ANALYZE"))
+            before = run_cases(args.repeat)
+            db.session.commit()
+
+            start = time.perf_counter()
+            for index in indexes:
+                index.create(db.engine)
+            print(f"Created {len(indexes)} indexes in {time.perf_counter() - start:.1f}s")
+
+            db.session.execute(text("ANALYZE"))
+            after = run_cases(args.repeat)
+
+            for name in before:
+                print(f"\n== {name} ==")
+                print(f"before {before[name][0]:10.2f} ms  {before[name][1]}")
+                print(f"after  {after[name][0]:10.2f} ms  {after[name][1]}")
+
+            db.session.remove()
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
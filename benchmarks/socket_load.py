@@ -0,0 +1,193 @@
+"""
+Open many concurrent Socket.IO websocket connections against wsgi:app under
+gunicorn, once per async mode, and compare how many one process holds.
+
+    python benchmarks/socket_load.py --modes threading eventlet --connections 1000
+
+Every connection is authenticated with a signed session cookie and joins its
+user room, like a browser tab. Clients speak the Engine.IO protocol directly
+over simple-websocket, so thousands of them fit in one asyncio loop.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import simple_websocket
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+
+SECRET_KEY = "socket-load-test"
+
+
+def session_cookie(user_id):
+    from flask import Flask
+
+    app = Flask(__name__)
+    app.secret_key = SECRET_KEY
+    serializer = app.session_interface.get_signing_serializer(app)
+    return serializer.dumps({"user_id": user_id})
+
+
+def start_server(mode, port, threads):
+    env = dict(
+        os.environ,
+        SOCKETIO_ASYNC_MODE=mode,
+        SECRET_KEY=SECRET_KEY,
+        DATABASE_URL=f"sqlite:///{tempfile.gettempdir()}/network50-load.db",
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_THREADS=str(threads),
+    )
+    env.pop("SOCKETIO_MESSAGE_QUEUE", None)
+
+    return subprocess.Popen(
+        ["gunicorn", "--config", "gunicorn.conf.py", "wsgi:app"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def process_rss(pid):
+    """Resident memory of a process and its children in MB, Linux only"""
+    total = 0
+    pids = [pid]
+
+    while pids:
+        current = pids.pop()
+        try:
+            with open(f"/proc/{current}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+            with open(f"/proc/{current}/task/{current}/children") as children:
+                pids.extend(int(child) for child in children.read().split())
+        except FileNotFoundError:
+            continue
+
+    return total / 1024
+
+
+async def open_connection(url, cookie, connected, stop):
+    """Connect one client, set connected after the handshake, keep it open until stop"""
+    start = time.perf_counter()
+    ws = await simple_websocket.AioClient.connect(
+        url, headers={"Cookie": f"session={cookie}"}
+    )
+
+    # Connect to the default namespace without waiting for the Engine.IO open
+    # packet, simple-websocket can drop a frame that arrives with the upgrade
+    await ws.send("40")
+    while not (await ws.receive()).startswith("40"):
+        pass
+
+    elapsed = time.perf_counter() - start
+    connected.set()
+
+    async def keep_alive():
+        while True:
+            packet = await ws.receive()
+            if packet == "2":
+                await ws.send("3")
+
+    ping = asyncio.ensure_future(keep_alive())
+    await stop.wait()
+    ping.cancel()
+    await ws.close()
+
+    return elapsed
+
+
+async def run_clients(port, connections, hold, concurrency, pid):
+    url = f"ws://127.0.0.1:{port}/socket.io/?EIO=4&transport=websocket"
+    cookies = [session_cookie(user_id) for user_id in range(1, 51)]
+    stop = asyncio.Event()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def client(n):
+        connected = asyncio.Event()
+        task = asyncio.ensure_future(
+            open_connection(url, cookies[n % 50], connected, stop)
+        )
+
+        # A handshake that fails or takes longer than 10s counts as refused
+        async with limit:
+            handshake = asyncio.ensure_future(connected.wait())
+            await asyncio.wait(
+                [task, handshake], timeout=10, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not connected.is_set():
+                task.cancel()
+            handshake.cancel()
+
+        return task
+
+    start = time.perf_counter()
+    tasks = await asyncio.gather(*(client(n) for n in range(connections)))
+    ramp_up = time.perf_counter() - start
+
+    await asyncio.sleep(hold)
+    memory = process_rss(pid)
+
+    stop.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    timings = [result for result in results if isinstance(result, float)]
+    errors = {type(result).__name__ for result in results if isinstance(result, Exception)}
+    if errors:
+        print(f"refused connections: {', '.join(sorted(errors))}")
+
+    return len(timings), ramp_up, timings, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=["threading", "eventlet"])
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100, help="handshakes in flight")
+    parser.add_argument("--hold", type=float, default=5, help="seconds to keep them open")
+    parser.add_argument("--threads", type=int, default=100, help="gthread threads")
+    parser.add_argument("--port", type=int, default=5400)
+    args = parser.parse_args()
+
+    rows = []
+    for mode in args.modes:
+        server = start_server(mode, args.port, args.threads)
+        time.sleep(3)
+
+        if server.poll() is not None:
+            print(f"{mode}: server failed to start, is the {mode} package installed?")
+            continue
+
+        try:
+            idle_rss = process_rss(server.pid)
+            connected, ramp_up, timings, memory = asyncio.run(
+                run_clients(
+                    args.port, args.connections, args.hold, args.concurrency, server.pid
+                )
+            )
+            rows.append((mode, connected, ramp_up, timings, memory - idle_rss))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"\n{'mode':<10} {'connected':>12} {'ramp-up s':>10} {'p50 ms':>8} {'p95 ms':>8} {'MB':>8}")
+    for mode, connected, ramp_up, timings, memory in rows:
+        p50 = p95 = float("nan")
+        if timings:
+            p50 = statistics.median(timings) * 1000
+            p95 = sorted(timings)[int(len(timings) * 0.95) - 1] * 1000
+        print(
+            f"{mode:<10} {connected:>6}/{args.connections:<5} {ramp_up:>10.1f} "
+            f"{p50:>8.1f} {p95:>8.1f} {memory:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Time the rendering of post text to HTML over a corpus of generated posts:
+the former two-pass renderer, the single-pass tokenizer, and the tokenizer
+behind its LRU cache as a feed would hit it.
+
+    python benchmarks/text_render.py --posts 20000 --views 200000
+
+Posts mix plain words, hashtags, links with and without '#' fragments and
+some HTML, in the proportions of a small social network. Views pick posts
+with a skew towards recent ones, like pages of a feed.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.helpers import HASHTAG_PATTERN, URL_PATTERN, process_text
+
+WORDS = (
+    "just finished the problem set week pset tideman was hard but fun "
+    "anyone up for a study group tonight check out my final project "
+    "debugging segfaults again finally passed check50 the lecture on "
+    "recursion blew my mind learning flask and sql this week"
+).split()
+TAGS = ["cs50", "python", "CS50x", "flask", "sql", "webdev", "AI", "help"]
+LINKS = [
+    "https://cs50.harvard.edu/x/2024/psets/",
+    "www.github.com/user/project",
+    "https://example.com/docs#section-2",
+    "www.youtube.com/watch?v=abc123#t=42",
+    "http://localhost:5000/",
+]
+
+
+def two_pass(text):
+    """The renderer before the tokenizer, URLs then hashtags over the result"""
+    def replace_url(match):
+        url = match.group(0)
+        full_url = "https://" + url if url.startswith("www.") else url
+        return f'<a href="{full_url}" target="_blank">{url}</a>'
+
+    def replace_tag(match):
+        tag = match.group(1)
+        return f'<a href="/tags/{tag.lower()}">#{tag}</a>'
+
+    return HASHTAG_PATTERN.sub(replace_tag, URL_PATTERN.sub(replace_url, text))
+
+
+def make_post(rng):
+    words = rng.choices(WORDS, k=rng.randint(5, 40))
+
+    for _ in range(rng.choice([0, 0, 1, 1, 2, 3])):
+        words.insert(rng.randrange(len(words) + 1), "#" + rng.choice(TAGS))
+    if rng.random() < 0.3:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(LINKS))
+    if rng.random() < 0.05:
+        words.insert(rng.randrange(len(words) + 1), "<3 & <b>bold</b>")
+
+    return " ".join(words)
+
+
+def time_per_item(render, texts):
+    start = time.perf_counter()
+    for text in texts:
+        render(text)
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--views", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [make_post(rng) for _ in range(args.posts)]
+    # Newest posts are at the end and are viewed the most
+    views = [
+        corpus[-1 - min(int(rng.expovariate(20 / args.posts)), args.posts - 1)]
+        for _ in range(args.views)
+    ]
+
+    tokenizer = process_text.__wrapped__
+    nested = re.compile(r'href="[^"]*<a ')
+    broken = sum(bool(nested.search(two_pass(text))) for text in corpus)
+
+    process_text.cache_clear()
+    results = [
+        ("two-pass", time_per_item(two_pass, views)),
+        ("single-pass", time_per_item(tokenizer, views)),
+        ("single-pass + LRU", time_per_item(process_text, views)),
+    ]
+    cache = process_text.cache_info()
+
+    print(f"{args.posts} posts, {args.views} views")
+    print(f"two-pass output with a tag link inside a URL anchor: {broken} posts")
+    print(f"LRU hit rate {cache.hits / (cache.hits + cache.misses):.1%}, {cache.currsize} entries\n")
+    print(f"{'renderer':<20} {'us/view':>8}")
+    for name, micros in results:
+        print(f"{name:<20} {micros:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# Gunicorn settings for wsgi:app, the worker class follows SOCKETIO_ASYNC_MODE
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "threading")
+
+WORKER_CLASSES = {
+    "threading": "gthread",
+    "eventlet": "eventlet",
+    # gevent needs the gevent and gevent-websocket packages
+    "gevent": "geventwebsocket.gunicorn.workers.GeventWebSocketWorker",
+}
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+worker_class = WORKER_CLASSES[ASYNC_MODE]
+
+# Socket.IO clients must always reach the process that holds their session,
+# gunicorn can't route them, so run one worker per instance and scale with
+# more instances behind nginx ip_hash and a SOCKETIO_MESSAGE_QUEUE
+workers = 1
+
+# Each websocket holds a thread in threading mode
+threads = int(os.getenv("GUNICORN_THREADS", 100))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+
+timeout = 120
+graceful_timeout = 30
+
+accesslog = "-"
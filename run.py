@@ -1,3 +1,4 @@
+# Development server, production runs wsgi:app under gunicorn (see gunicorn.conf.py)
 from app import create_app, socketio
 
 print("Starting application...")
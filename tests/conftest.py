@@ -0,0 +1,99 @@
+import pytest
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models import Friendship, FriendshipStatusEnum, User, UserClass, UserInterest
+from app.services.friendships import create_friend_request
+from app.services.suggestions import rebuild_suggestions
+
+# More authors than fit on a feed page, so a query per author overflows the budget
+USERNAMES = [f"u{i}" for i in range(24)]
+
+
+class InMemoryConfig(TestingConfig):
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+
+
+def login(client, user_id):
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+
+
+def seed_users():
+    """
+    Users with classes and interests. u0 is friends with u1..u20 and has a
+    pending request from u21, a few of the others know each other.
+    """
+    db.session.add_all(
+        User(
+            username=username,
+            email=f"{username}@example.com",
+            password="password",
+            name=f"Name {username}",
+            surname=f"Surname {username}",
+            is_completed=True,
+            classes=[UserClass(name="CS50x")],
+            interests=[UserInterest(name="Music")],
+        )
+        for username in USERNAMES
+    )
+    db.session.commit()
+
+    pairs = [(1, user_id) for user_id in range(2, 22)]
+    pairs += [(2, 3), (3, 4), (4, 23), (21, 23), (23, 24)]
+    for a, b in pairs:
+        db.session.add(
+            Friendship(
+                user_a_id=a,
+                user_b_id=b,
+                status=FriendshipStatusEnum.ACCEPTED,
+                requested_by_id=a,
+            )
+        )
+    create_friend_request(22, 1)
+    db.session.commit()
+
+    rebuild_suggestions()
+    db.session.commit()
+
+
+@pytest.fixture
+def app():
+    app = create_app(InMemoryConfig)
+
+    # Requests must not run inside this context, the query counter keeps its
+    # count on g, which would then be shared by all of them
+    with app.app_context():
+        db.create_all()
+        seed_users()
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """
+    A client logged in as u0, after every user posted and the first three
+    commented on and liked every post, through the routes so timelines,
+    hashtags and counters are filled the way the app fills them.
+    """
+    client = app.test_client()
+    user_ids = range(1, len(USERNAMES) + 1)
+
+    for user_id in user_ids:
+        login(client, user_id)
+        client.post("/post", data={"content": f"Post by {user_id} #cs50"})
+
+    post_ids = range(1, len(USERNAMES) + 1)
+    for user_id in user_ids[:3]:
+        login(client, user_id)
+        for post_id in post_ids:
+            client.post(f"/comment/{post_id}", json=f"Comment by {user_id}")
+            client.post(f"/like/{post_id}")
+
+    login(client, 1)
+    return client
@@ -0,0 +1,28 @@
+"""
+Every request under TestingConfig fails with QueryBudgetExceeded when it runs
+more than QUERY_BUDGET statements, these tests load the pages that show many
+rows at once so an N+1 query shows up as a failure.
+"""
+
+import pytest
+
+
+def query_count(response):
+    return int(response.headers["X-Query-Count"])
+
+
+@pytest.mark.parametrize(
+    "url", ["/", "/profiles/u0", "/profiles/u2", "/posts/1", "/tags/cs50"]
+)
+def test_page_within_budget(app, client, url):
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert query_count(response) <= app.config["QUERY_BUDGET"]
+
+
+def test_accept_friend_request_within_budget(app, client):
+    response = client.post("/requests/u21/accept")
+
+    assert response.status_code == 200
+    assert query_count(response) <= app.config["QUERY_BUDGET"]
@@ -0,0 +1,24 @@
+# Production entry point, run with: gunicorn --config gunicorn.conf.py wsgi:app
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# eventlet and gevent have to patch the standard library before anything
+# else imports socket, threading or ssl
+ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "threading")
+
+if ASYNC_MODE == "eventlet":
+    import eventlet
+
+    eventlet.monkey_patch()
+elif ASYNC_MODE == "gevent":
+    from gevent import monkey
+
+    monkey.patch_all()
+
+from app import create_app
+from app.config import ProductionConfig
+
+app = create_app(ProductionConfig)